@@ -0,0 +1,47 @@
+"""JSON helpers that use orjson when it is installed."""
+from __future__ import annotations
+
+import json
+from typing import Any
+
+try:  # pragma: no cover - exercised only when the speedups extra is installed
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+HAS_ORJSON = orjson is not None
+
+# Stdlib encoder settings equivalent to orjson's sorted-key output.
+CANONICAL_OPTIONS: dict[str, Any] = {"sort_keys": True, "separators": (",", ":"), "ensure_ascii": False}
+
+
+def loads(data: str | bytes) -> Any:
+    """Decode ``data`` (``str`` or UTF-8 ``bytes``) into Python objects."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps(obj: Any) -> str:
+    """Encode ``obj`` as a JSON string."""
+    if orjson is not None:
+        return orjson.dumps(obj).decode("utf-8")
+    return json.dumps(obj)
+
+
+def dumps_canonical(obj: Any) -> bytes:
+    """Encode ``obj`` compactly with sorted keys as UTF-8 bytes, for fingerprinting.
+
+    The stdlib branch matches orjson's output (no whitespace, non-ASCII kept
+    as UTF-8) so stored content and fingerprints don't depend on the install.
+    """
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS)
+    return json.dumps(obj, **CANONICAL_OPTIONS).encode("utf-8")
+
+
+def dumps_pretty(obj: Any) -> str:
+    """Encode ``obj`` with sorted keys and a two-space indent."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SORT_KEYS | orjson.OPT_INDENT_2).decode("utf-8")
+    return json.dumps(obj, sort_keys=True, indent=2)
@@ -1,64 +1,139 @@
 """Helpers for editing caddy-tui snapshot blocks."""
 from __future__ import annotations
 
+from contextlib import contextmanager
 from datetime import datetime, timezone
-from hashlib import sha256
+from hashlib import blake2b
 from pathlib import Path
-from typing import Iterable
+from typing import Iterable, Iterator
 
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
 
 from . import models
-from .caddyfile_parser import ParsedBlock, parse_caddyfile_text
+from .caddyfile_parser import ParsedBlock, fingerprint, is_whitespace_or_comments, parse_caddyfile_text
 from .db import session_scope
-from .importer import DEFAULT_CONFIG_NAME, _write_snapshot
+from .importer import DEFAULT_CONFIG_NAME, SNAPSHOT_FORMAT_VERSION, _write_snapshot
 from .snapshots import get_snapshot, render_snapshot_text
 
 
 EDITOR_SOURCE_LABEL = "caddy-tui editor"
 
 
-def load_caddy_tui_blocks(db_path: Path) -> list[ParsedBlock]:
+@contextmanager
+def editing_session(db_path: Path) -> Iterator[tuple[Session, models.Config | None]]:
+    """Open a session for loading or saving caddy-tui blocks.
+
+    Yields ``(session, config)``; pass the session to
+    :func:`load_caddy_tui_blocks` or :func:`save_caddy_tui_blocks` so they
+    reuse the memoised ``Config`` row. Keep interactive steps such as
+    ``$EDITOR`` outside the block, since the session holds the database lock.
+    """
+    with session_scope(db_path=db_path) as session:
+        yield session, _default_config(session)
+
+
+def load_caddy_tui_blocks(db_path: Path, *, session: Session | None = None) -> list[ParsedBlock]:
     """Return the parsed blocks for the caddy-tui snapshot."""
-    text = _snapshot_text(db_path)
+    if session is None:
+        with session_scope(db_path=db_path) as own_session:
+            text = _snapshot_text(own_session)
+    else:
+        text = _snapshot_text(session)
     if text is None:
         return []
     parsed = parse_caddyfile_text(text)
     return parsed.blocks
 
 
-def save_caddy_tui_blocks(blocks: list[ParsedBlock], db_path: Path, *, source_label: str = EDITOR_SOURCE_LABEL) -> None:
+def save_caddy_tui_blocks(
+    blocks: list[ParsedBlock],
+    db_path: Path,
+    *,
+    source_label: str = EDITOR_SOURCE_LABEL,
+    session: Session | None = None,
+) -> None:
     """Persist parsed blocks back to the caddy-tui snapshot."""
-    text = blocks_to_text(blocks)
-    parsed = parse_caddyfile_text(text)
-    digest = sha256(text.encode("utf-8")).hexdigest()
-    collected_at = datetime.now(timezone.utc)
+    if session is None:
+        with session_scope(db_path=db_path) as own_session:
+            _save_blocks(own_session, blocks, source_label)
+    else:
+        _save_blocks(session, blocks, source_label)
 
-    with session_scope(db_path=db_path) as session:
-        config = session.scalar(select(models.Config).where(models.Config.name == DEFAULT_CONFIG_NAME))
-        if config is None:
-            raise RuntimeError("Initialise the database before editing blocks.")
-        _write_snapshot(
-            session,
-            config,
-            models.SNAPSHOT_KIND_CADDY_TUI,
-            parsed.blocks,
-            source_path=source_label,
-            source_hash=digest,
-            collected_at=collected_at,
-        )
 
+def _save_blocks(session: Session, blocks: list[ParsedBlock], source_label: str) -> None:
+    data, hashed = _encode_and_hash(blocks)
+    digest = hashed.hexdigest()
+    collected_at = datetime.now(timezone.utc)
 
-def blocks_to_text(blocks: Iterable[ParsedBlock]) -> str:
-    parts: list[str] = []
+    config = _default_config(session)
+    if config is None:
+        raise RuntimeError("Initialise the database before editing blocks.")
+    current = session.execute(
+        select(
+            models.ConfigSnapshot.id,
+            models.ConfigSnapshot.source_hash,
+            models.ConfigSnapshot.snapshot_format,
+        ).where(
+            models.ConfigSnapshot.config_id == config.id,
+            models.ConfigSnapshot.source_kind == models.SNAPSHOT_KIND_CADDY_TUI,
+        )
+    ).first()
+    if (
+        current is not None
+        and current.source_hash == digest
+        and current.snapshot_format == SNAPSHOT_FORMAT_VERSION
+    ):
+        # Nothing changed; just record that the snapshot is still current.
+        session.execute(
+            update(models.ConfigSnapshot)
+            .where(models.ConfigSnapshot.id == current.id)
+            .values(collected_at=collected_at, source_path=source_label)
+        )
+        return
+    normalised = _normalise_blocks(blocks)
+    if normalised is None:
+        normalised = parse_caddyfile_text(data.decode("utf-8"), digest=hashed.digest()).blocks
+    _write_snapshot(
+        session,
+        config,
+        models.SNAPSHOT_KIND_CADDY_TUI,
+        normalised,
+        source_path=source_label,
+        source_hash=digest,
+        collected_at=collected_at,
+    )
+
+
+def iter_block_bytes(blocks: Iterable[ParsedBlock]) -> Iterator[bytes]:
+    """Yield the UTF-8 encoded text of ``blocks`` piece by piece."""
     for block in blocks:
         if block.raw_prelude:
-            parts.append(block.raw_prelude)
+            yield block.raw_prelude.encode("utf-8")
         for fragment in block.fragments:
-            parts.append(fragment.content)
+            yield fragment.content.encode("utf-8")
         if block.raw_postlude:
-            parts.append(block.raw_postlude)
-    return "".join(parts)
+            yield block.raw_postlude.encode("utf-8")
+
+
+def blocks_to_bytes(blocks: Iterable[ParsedBlock]) -> bytes:
+    """Return the UTF-8 encoded text of ``blocks`` as a single buffer."""
+    buf = bytearray()
+    extend = buf.extend
+    for chunk in iter_block_bytes(blocks):
+        extend(chunk)
+    return bytes(buf)
+
+
+def _encode_and_hash(blocks: Iterable[ParsedBlock]) -> tuple[bytes, blake2b]:
+    # One update over the joined buffer is cheaper than hashing every small
+    # fragment separately.
+    data = blocks_to_bytes(blocks)
+    return data, fingerprint(data)
+
+
+def blocks_to_text(blocks: Iterable[ParsedBlock]) -> str:
+    return blocks_to_bytes(blocks).decode("utf-8")
 
 
 def parse_single_block(text: str) -> ParsedBlock:
@@ -70,12 +145,52 @@ def parse_single_block(text: str) -> ParsedBlock:
     return blocks[0]
 
 
-def _snapshot_text(db_path: Path) -> str | None:
-    with session_scope(db_path=db_path) as session:
-        config = session.scalar(select(models.Config).where(models.Config.name == DEFAULT_CONFIG_NAME))
-        if config is None:
+def _normalise_blocks(blocks: list[ParsedBlock]) -> list[ParsedBlock] | None:
+    """Return ``blocks`` laid out exactly as a reparse of their text would be.
+
+    The parser attaches inter-block whitespace and comments to the following
+    block's prelude, so only postludes need moving. Returns ``None`` when the
+    blocks cannot be normalised cheaply and a full reparse is required.
+    """
+    result: list[ParsedBlock] = []
+    carry = ""
+    last = len(blocks) - 1
+    for index, block in enumerate(blocks):
+        if [fragment.kind for fragment in block.fragments] != ["header", "body", "footer"]:
             return None
-        snapshot = get_snapshot(session, config.id, models.SNAPSHOT_KIND_CADDY_TUI)
-        if snapshot is None:
+        prelude = carry + block.raw_prelude
+        if not is_whitespace_or_comments(prelude):
             return None
-        return render_snapshot_text(snapshot)
+        postlude = block.raw_postlude
+        carry = ""
+        if index != last:
+            carry, postlude = postlude, ""
+        result.append(
+            ParsedBlock(
+                labels=block.labels,
+                is_global=block.is_global,
+                raw_prelude=prelude,
+                raw_postlude=postlude,
+                fragments=block.fragments,
+            )
+        )
+    return result
+
+
+def _default_config(session: Session) -> models.Config | None:
+    # Memoise the Config row on the session so an editing session looks it up once.
+    if "caddy_tui_config" not in session.info:
+        session.info["caddy_tui_config"] = session.scalar(
+            select(models.Config).where(models.Config.name == DEFAULT_CONFIG_NAME)
+        )
+    return session.info["caddy_tui_config"]
+
+
+def _snapshot_text(session: Session) -> str | None:
+    config = _default_config(session)
+    if config is None:
+        return None
+    snapshot = get_snapshot(session, config.id, models.SNAPSHOT_KIND_CADDY_TUI, with_blocks=True)
+    if snapshot is None:
+        return None
+    return render_snapshot_text(snapshot)
@@ -1,13 +1,15 @@
 """Integration helpers for invoking the caddy binary."""
 from __future__ import annotations
 
-import json
+from functools import lru_cache
+import os
 import subprocess
 from pathlib import Path
 from shutil import which
 from typing import Any
 
-from .config import AppPaths, CADDY_BIN
+from . import _json
+from .config import AppPaths, CADDY_BIN, STRICT_VALIDATE
 
 
 class CaddyError(RuntimeError):
@@ -16,23 +18,46 @@ class CaddyError(RuntimeError):
 
 def _caddy_bin(paths: AppPaths | None = None) -> str:
     configured = (paths.caddy_bin if paths else None) or CADDY_BIN
-    candidate = configured or which("caddy")
+    candidate = configured or _which_caddy(os.environ.get("PATH"))
     if not candidate:
+        # Don't remember misses so a caddy installed mid-session is picked up.
+        _which_caddy.cache_clear()
         raise CaddyError("Unable to locate caddy binary. Set CADDY_TUI_CADDY_BIN.")
     return candidate
 
 
+@lru_cache(maxsize=8)
+def _which_caddy(search_path: str | None) -> str | None:
+    return which("caddy", path=search_path)
+
+
+# `caddy adapt` reads its input with a plain file read, so the rendered text can
+# be piped in through this path instead of a temporary file. The Caddyfile
+# adapter adds the input path to every file_server's hide list, so callers
+# scrubbing that list should drop this path too.
+STDIN_CONFIG_PATH = "/dev/stdin"
+
+
 def adapt_caddyfile(path: Path, *, paths: AppPaths | None = None) -> dict[str, Any]:
+    return _adapt(str(path), None, paths)
+
+
+def adapt_caddyfile_text(text: str, *, paths: AppPaths | None = None) -> dict[str, Any]:
+    """Adapt Caddyfile ``text`` without writing it to disk."""
+    return _adapt(STDIN_CONFIG_PATH, text.encode("utf-8"), paths)
+
+
+def _adapt(config_path: str, stdin: bytes | None, paths: AppPaths | None) -> dict[str, Any]:
     bin_path = _caddy_bin(paths)
     proc = subprocess.run(
-        [bin_path, "adapt", "--config", str(path), "--adapter", "caddyfile", "--pretty"],
+        [bin_path, "adapt", "--config", config_path, "--adapter", "caddyfile"],
+        input=stdin,
         check=False,
         capture_output=True,
-        text=True,
     )
     if proc.returncode != 0:
-        raise CaddyError(proc.stderr.strip() or "caddy adapt failed")
-    return json.loads(proc.stdout)
+        raise CaddyError(proc.stderr.decode("utf-8", "replace").strip() or "caddy adapt failed")
+    return _json.loads(proc.stdout)
 
 
 def validate_config(config_path: Path, fmt: str = "caddyfile", *, paths: AppPaths | None = None) -> None:
@@ -40,9 +65,9 @@ def validate_config(config_path: Path, fmt: str = "caddyfile", *, paths: AppPath
     cmd = [bin_path, "validate", "--config", str(config_path)]
     if fmt == "caddyfile":
         cmd.extend(["--adapter", "caddyfile"])
-    proc = subprocess.run(cmd, check=False, capture_output=True, text=True)
+    proc = subprocess.run(cmd, check=False, capture_output=True)
     if proc.returncode != 0:
-        raise CaddyError(proc.stderr.strip() or "caddy validate failed")
+        raise CaddyError(proc.stderr.decode("utf-8", "replace").strip() or "caddy validate failed")
 
 
 def reload_caddy(config_path: Path, fmt: str = "caddyfile", *, paths: AppPaths | None = None) -> None:
@@ -52,6 +77,24 @@ def reload_caddy(config_path: Path, fmt: str = "caddyfile", *, paths: AppPaths |
         cmd.extend(["--adapter", "caddyfile"])
     elif fmt == "json":
         cmd.extend(["--adapter", "json"])
-    proc = subprocess.run(cmd, check=False, capture_output=True, text=True)
+    proc = subprocess.run(cmd, check=False, capture_output=True)
     if proc.returncode != 0:
-        raise CaddyError(proc.stderr.strip() or "caddy reload failed")
+        raise CaddyError(proc.stderr.decode("utf-8", "replace").strip() or "caddy reload failed")
+
+
+def validate_then_reload(
+    config_path: Path,
+    fmt: str = "caddyfile",
+    *,
+    paths: AppPaths | None = None,
+    strict: bool = STRICT_VALIDATE,
+) -> None:
+    """Reload caddy with ``config_path``, validating it first only when ``strict``.
+
+    ``caddy reload`` already loads and provisions the config before switching
+    over, so a separate ``caddy validate`` run is only needed when the stricter
+    checks (e.g. TLS provisioning) are wanted.
+    """
+    if strict:
+        validate_config(config_path, fmt, paths=paths)
+    reload_caddy(config_path, fmt, paths=paths)
@@ -1,8 +1,11 @@
 """Lightweight parser that segments a Caddyfile into server blocks."""
 from __future__ import annotations
 
+from bisect import bisect_left
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import List
+from hashlib import blake2b
+import re
 
 
 @dataclass(slots=True)
@@ -29,7 +32,22 @@ class CaddyfileParseError(RuntimeError):
     pass
 
 
-def parse_caddyfile_text(text: str) -> ParsedConfig:
+_LABEL_RE = re.compile(r"[^\s,]+")
+_WS_OR_COMMENT_RE = re.compile(r"(?:[ \t\r\n]+|#[^\n]*\n?)*")
+_PARSE_CACHE_SIZE = 16
+_PARSE_CACHE: OrderedDict[bytes, ParsedConfig] = OrderedDict()
+
+
+def fingerprint(data: bytes = b"") -> blake2b:
+    """Return a 32-byte BLAKE2b hash object used to identify config content.
+
+    These digests only answer "has this changed?", so the faster BLAKE2b is
+    used instead of SHA-256.
+    """
+    return blake2b(data, digest_size=32)
+
+
+def parse_caddyfile_text(text: str, *, digest: bytes | None = None) -> ParsedConfig:
     """Parse the Caddyfile text into ordered blocks.
 
     This parser is intentionally conservative: it only cares about brace
@@ -37,10 +55,53 @@ def parse_caddyfile_text(text: str) -> ParsedConfig:
     also recording the host labels that appear in the header. Comments and
     whitespace between blocks are preserved via the per-block ``raw_prelude``
     and ``raw_postlude`` fields.
+
+    Results are cached by the :func:`fingerprint` digest of ``text``; callers
+    that have already hashed the text can pass ``digest`` to skip rehashing it. Each
+    call returns a fresh copy, so callers may mutate the blocks freely.
     """
 
+    key = digest if digest is not None else fingerprint(text.encode("utf-8")).digest()
+    cached = _PARSE_CACHE.get(key)
+    if cached is None:
+        cached = _parse_blocks(text)
+        _PARSE_CACHE[key] = cached
+        if len(_PARSE_CACHE) > _PARSE_CACHE_SIZE:
+            _PARSE_CACHE.popitem(last=False)
+    else:
+        _PARSE_CACHE.move_to_end(key)
+    return _clone_config(cached)
+
+
+def is_whitespace_or_comments(text: str) -> bool:
+    """Return whether ``text`` holds only whitespace and complete comment lines.
+
+    Such text can sit in front of a block header without changing how it
+    parses; a trailing comment with no newline would swallow the header.
+    """
+    # The "{" sentinel stands in for the header that would follow.
+    return _consume_ws_and_comments(text + "{", 0)[0] == len(text)
+
+
+def _clone_config(config: ParsedConfig) -> ParsedConfig:
+    return ParsedConfig(
+        blocks=[
+            ParsedBlock(
+                labels=list(block.labels),
+                is_global=block.is_global,
+                raw_prelude=block.raw_prelude,
+                raw_postlude=block.raw_postlude,
+                fragments=[ParsedFragment(kind=fragment.kind, content=fragment.content) for fragment in block.fragments],
+            )
+            for block in config.blocks
+        ]
+    )
+
+
+def _parse_blocks(text: str) -> ParsedConfig:
     length = len(text)
     pos = 0
+    braces = _index_braces(text)
     blocks: list[ParsedBlock] = []
     pending_ws = ""
 
@@ -48,7 +109,7 @@ def parse_caddyfile_text(text: str) -> ParsedConfig:
     pending_ws += leading
 
     while pos < length:
-        brace_index = _find_next_char(text, "{", pos)
+        brace_index = text.find("{", pos)
         if brace_index == -1:
             # Remainder is trailing whitespace/comments.
             pending_ws += text[pos:]
@@ -61,7 +122,7 @@ def parse_caddyfile_text(text: str) -> ParsedConfig:
         pos = brace_index + 1
         body_start = pos
 
-        closing_index = _find_matching_brace(text, brace_index)
+        closing_index = _find_matching_brace(text, braces, brace_index)
         if closing_index is None:
             raise CaddyfileParseError("Unbalanced braces in Caddyfile")
         block_end = closing_index + 1
@@ -106,56 +167,51 @@ def parse_caddyfile_text(text: str) -> ParsedConfig:
 
 
 def _consume_ws_and_comments(text: str, pos: int) -> tuple[int, str]:
-    length = len(text)
-    fragments: List[str] = []
-    while pos < length:
-        ch = text[pos]
-        if ch in " \t\r\n":
-            start = pos
-            while pos < length and text[pos] in " \t\r\n":
-                pos += 1
-            fragments.append(text[start:pos])
-        elif ch == "#":
-            start = pos
-            newline = text.find("\n", pos)
-            if newline == -1:
-                fragments.append(text[start:])
-                pos = length
-            else:
-                fragments.append(text[start : newline + 1])
-                pos = newline + 1
-        else:
-            break
-    return pos, "".join(fragments)
+    # A single anchored regex match consumes the whole whitespace/comment run
+    # inside the regex engine; comments end at (and include) the next newline.
+    match = _WS_OR_COMMENT_RE.match(text, pos)
+    return match.end(), match.group(0)
+
 
+def _index_braces(text: str) -> list[int]:
+    """Return the sorted offsets of every ``{`` and ``}`` in ``text``.
 
-def _find_next_char(text: str, target: str, start: int) -> int:
-    idx = text.find(target, start)
-    return idx if idx != -1 else -1
+    Interleaved ``str.find`` calls skip runs of ordinary characters with
+    memchr-style scans; whichever brace lies further ahead is remembered so
+    each character is only scanned once per brace kind.
+    """
+    positions: list[int] = []
+    append = positions.append
+    find = text.find
+    next_open = find("{")
+    next_close = find("}")
+    while next_open != -1 or next_close != -1:
+        if next_close == -1 or (next_open != -1 and next_open < next_close):
+            append(next_open)
+            next_open = find("{", next_open + 1)
+        else:
+            append(next_close)
+            next_close = find("}", next_close + 1)
+    return positions
 
 
-def _find_matching_brace(text: str, open_index: int) -> int | None:
+def _find_matching_brace(text: str, braces: list[int], open_index: int) -> int | None:
     depth = 0
-    idx = open_index
-    length = len(text)
-    while idx < length:
-        ch = text[idx]
-        if ch == "{":
+    cursor = bisect_left(braces, open_index)
+    total = len(braces)
+    while cursor < total:
+        idx = braces[cursor]
+        if text[idx] == "{":
             depth += 1
-        elif ch == "}":
+        else:
             depth -= 1
             if depth == 0:
                 return idx
-        idx += 1
+        cursor += 1
     return None
 
 
 def _split_labels(header_text: str) -> list[str]:
-    cleaned = header_text.replace("\n", " ")
-    tokens: list[str] = []
-    for part in cleaned.split():
-        for chunk in part.split(","):
-            value = chunk.strip()
-            if value:
-                tokens.append(value)
-    return tokens
\ No newline at end of file
+    # Commas and whitespace both separate labels; one regex scan tokenises the
+    # header without building an intermediate comma-normalised copy.
+    return _LABEL_RE.findall(header_text)
\ No newline at end of file
@@ -2,24 +2,19 @@
 from __future__ import annotations
 
 from pathlib import Path
-import json
 
 import click
 
-from . import models
 from .config import GENERATED_CADDYFILE, GENERATED_JSON, LIVE_CADDYFILE, ensure_app_dir, DB_PATH
-from .db import init_db
-from .importer import import_caddyfile, CaddyfilePermissionError
-from .exporter import generate_caddyfile
-from .caddy_integration import validate_config, reload_caddy
-from .tui_app import run_tui
-from .versioning import collect_version_info, store_current_version
-from .status import collect_app_status, refresh_live_snapshot
-from .drift import compare_caddyfile
+
+# Everything else (SQLAlchemy, rich, the TUI) is imported inside the command
+# that needs it so `--help`, `version` and friends start quickly.
 
 
 def _echo_json(payload: dict) -> None:
-    click.echo(json.dumps(payload))
+    from . import _json
+
+    click.echo(_json.dumps(payload))
 
 
 @click.group()
@@ -32,6 +27,9 @@ def main() -> None:
 @click.option("--db", "db_path", type=click.Path(dir_okay=False, path_type=Path))
 def init(db_path: Path | None) -> None:
     """Initialise the SQLite database."""
+    from .db import init_db
+    from .versioning import store_current_version
+
     ensure_app_dir()
     target = db_path or DB_PATH
     init_db(target)
@@ -43,6 +41,11 @@ def init(db_path: Path | None) -> None:
 @click.option("--caddyfile", type=click.Path(exists=True, dir_okay=False, path_type=Path))
 def import_cmd(caddyfile: Path | None) -> None:
     """Import an existing Caddyfile."""
+    from .db import init_db
+    from .importer import CaddyfilePermissionError, import_caddyfile
+    from .status import refresh_live_snapshot
+    from .versioning import store_current_version
+
     init_db()
     try:
         summary = import_caddyfile(caddyfile)
@@ -65,6 +68,11 @@ def import_cmd(caddyfile: Path | None) -> None:
 @click.option("--format", "fmt", type=click.Choice(["caddyfile", "json"]), default="caddyfile")
 def apply(output: Path | None, fmt: str) -> None:
     """Generate, validate and reload Caddy."""
+    from .caddy_integration import validate_then_reload
+    from .exporter import generate_caddyfile
+    from .status import refresh_live_snapshot
+    from .versioning import store_current_version
+
     if fmt == "caddyfile":
         target = output or GENERATED_CADDYFILE
         generate_caddyfile(target)
@@ -72,8 +80,7 @@ def apply(output: Path | None, fmt: str) -> None:
         target = output or GENERATED_JSON
         # TODO: implement JSON exporter
         target.write_text("{}\n")
-    validate_config(target, fmt)
-    reload_caddy(target, fmt)
+    validate_then_reload(target, fmt)
     store_current_version()
     _echo_json({"status": "ok", "format": fmt, "output": str(target)})
     refresh_live_snapshot(live_caddyfile=LIVE_CADDYFILE)
@@ -82,6 +89,8 @@ def apply(output: Path | None, fmt: str) -> None:
 @main.command()
 def tui() -> None:
     """Launch the interactive menu UI (import, drift diff, live refresh, reload)."""
+    from .tui_app import run_tui
+
     run_tui()
 
 
@@ -89,6 +98,10 @@ def tui() -> None:
 @click.option("--format", "fmt", type=click.Choice(["caddyfile", "json"]), default="caddyfile")
 def validate(fmt: str) -> None:
     """Generate and validate the config without reloading."""
+    from .caddy_integration import validate_config
+    from .exporter import generate_caddyfile
+    from .versioning import store_current_version
+
     if fmt == "caddyfile":
         target = GENERATED_CADDYFILE
         generate_caddyfile(target)
@@ -103,6 +116,8 @@ def validate(fmt: str) -> None:
 @main.command("version")
 def version_cmd() -> None:
     """Report current and latest known versions."""
+    from .versioning import collect_version_info
+
     info = collect_version_info()
     _echo_json(
         {
@@ -118,6 +133,9 @@ def version_cmd() -> None:
 @main.command("refresh-live")
 def refresh_live_cmd() -> None:
     """Refresh the live snapshot via the configured helper (same as TUI option 'r')."""
+    from . import models
+    from .status import refresh_live_snapshot
+
     info = refresh_live_snapshot(live_caddyfile=LIVE_CADDYFILE)
     payload = {
         "status": "ok",
@@ -143,6 +161,11 @@ def refresh_live_cmd() -> None:
 @click.option("--refresh-live", is_flag=True, help="Refresh the live snapshot before reporting status.")
 def status(caddyfile_path: Path | None, diff: bool, refresh_live: bool) -> None:
     """Report snapshot drift, block counts, and optionally refresh the live helper snapshot."""
+    from . import models
+    from .drift import compare_caddyfile
+    from .importer import import_caddyfile
+    from .status import collect_app_status
+
     if caddyfile_path:
         import_caddyfile(caddyfile_path, target_snapshot=models.SNAPSHOT_KIND_CADDYFILE, mirror_to=())
 
@@ -32,6 +32,7 @@ GENERATED_JSON = Path(
 )
 CADDY_BIN = os.environ.get("CADDY_TUI_CADDY_BIN")
 RELOAD_MODE = os.environ.get("CADDY_TUI_RELOAD_MODE", "caddy")
+STRICT_VALIDATE = os.environ.get("CADDY_TUI_STRICT_VALIDATE", "").lower() in {"1", "true", "yes"}
 LIVE_CADDYFILE = (
     Path(os.environ["CADDY_TUI_LIVE_CADDYFILE"]).expanduser()
     if os.environ.get("CADDY_TUI_LIVE_CADDYFILE")
@@ -4,29 +4,66 @@ from __future__ import annotations
 from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
+from threading import RLock, local
+import os
 from typing import Iterator
 
 from sqlalchemy import create_engine, event, text
 from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import StaticPool
 
 from . import models
 from .config import DB_PATH, ensure_app_dir
 
 
+# Applied to every new SQLite connection. WAL plus synchronous=NORMAL avoids an
+# fsync per commit, and the cache/mmap sizes keep snapshot reads in memory.
+_CONNECTION_PRAGMAS = (
+    "PRAGMA foreign_keys = ON",
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -65536",
+    "PRAGMA mmap_size = 268435456",
+)
+
+# Bump whenever _bootstrap_schema learns a new migration so existing stamps
+# stop short-circuiting it.
+SCHEMA_STAMP_VERSION = 5
+
 _engine = None
+_engine_generation = 0
 _SessionLocal: sessionmaker[Session] | None = None
+# The engine shares a single sqlite3 connection, so transactions from
+# different threads must not interleave on it.
+_session_lock = RLock()
+# The session currently open on this thread, reused by nested session_scope
+# calls: closing a second session would reset the shared connection and roll
+# back the outer transaction.
+_active = local()
+# The shared connection's driver handle, captured when it is opened so
+# data_fingerprint can read it without a pool checkout (returning the
+# connection to the pool rolls it back).
+_driver_connection = None
 
 
 def get_engine(db_path: Path | str | None = None):
     """Return a singleton engine for the configured DB path."""
-    global _engine, _SessionLocal
+    global _engine, _engine_generation, _SessionLocal, _driver_connection
     if _engine is None:
+        _driver_connection = None
+        _engine_generation += 1
         ensure_app_dir()
         path = Path(db_path or DB_PATH)
-        _engine = create_engine(f"sqlite:///{path}", future=True)
-        event.listen(_engine, "connect", _enable_foreign_keys)
+        _engine = create_engine(
+            f"sqlite:///{path}",
+            future=True,
+            poolclass=StaticPool,
+            connect_args={"check_same_thread": False},
+        )
+        event.listen(_engine, "connect", _configure_connection)
         _SessionLocal = sessionmaker(bind=_engine, expire_on_commit=False, future=True)
-        _bootstrap_schema(_engine)
+        _bootstrap_schema(_engine, path)
     return _engine
 
 
@@ -36,39 +73,151 @@ def init_db(db_path: Path | str | None = None) -> None:
     models.Base.metadata.create_all(engine)
 
 
+def data_fingerprint(db_path: Path | str | None = None, *, session: Session | None = None) -> tuple:
+    """Return a cheap token that changes whenever the database contents may have.
+
+    Combines the engine instance, the mtimes of the database and its WAL file,
+    the shared connection's ``PRAGMA data_version`` (bumped by commits from
+    other connections, even within one mtime tick) and its ``total_changes``
+    counter (writes from this process). Pending changes on ``session`` (or the
+    session open on this thread) are flushed first so the counter reflects
+    them.
+    """
+    engine = get_engine(db_path=db_path)
+    database = engine.url.database or ""
+    mtimes = []
+    for suffix in ("", "-wal"):
+        try:
+            mtimes.append(os.stat(database + suffix).st_mtime_ns)
+        except OSError:
+            mtimes.append(None)
+    session = session if session is not None else getattr(_active, "session", None)
+    if session is not None:
+        session.flush()
+        driver = session.connection().connection.driver_connection
+        return (_engine_generation, database, *mtimes, *_connection_counters(driver))
+    with _session_lock:
+        counters = _connection_counters(_driver_connection) if _driver_connection is not None else (0, 0)
+    return (_engine_generation, database, *mtimes, *counters)
+
+
+def _connection_counters(driver) -> tuple[int, int]:
+    """Return ``(data_version, total_changes)`` for a raw sqlite3 connection."""
+    (data_version,) = driver.execute("PRAGMA data_version").fetchone()
+    return data_version, driver.total_changes
+
+
 @contextmanager
 def session_scope(db_path: Path | str | None = None) -> Iterator[Session]:
-    """Provide a transactional scope."""
+    """Provide a transactional scope.
+
+    Nested calls on the same thread reuse the open session; their changes are
+    flushed on exit and committed with the outermost scope.
+    """
     if _SessionLocal is None:
         get_engine(db_path=db_path)
     assert _SessionLocal is not None  # safety
-    session = _SessionLocal()
+    outer = getattr(_active, "session", None)
+    if outer is not None:
+        yield outer
+        outer.flush()
+        return
+    with _session_lock:
+        session = _SessionLocal()
+        _active.session = session
+        try:
+            yield session
+            session.commit()
+        except Exception:  # pragma: no cover
+            session.rollback()
+            raise
+        finally:
+            _active.session = None
+            session.close()
+
+
+def _bootstrap_schema(engine, path: Path | None = None) -> None:
+    """Create tables and apply lightweight migrations when needed.
+
+    When ``path`` is given, a ``.schema-stamp`` sidecar records the database
+    file's mtime after a successful bootstrap so later runs against an
+    unchanged file can skip the work.
+    """
+    stamp_path = path.with_suffix(".schema-stamp") if path is not None else None
+    if stamp_path is not None:
+        current = _current_stamp(path)
+        if current is not None and _read_stamp(stamp_path) == current:
+            return
+    models.Base.metadata.create_all(engine)
+    _ensure_indexes(engine)
+    _ensure_columns(engine)
+    _ensure_schema_version(engine)
+    if stamp_path is not None:
+        _write_stamp(engine, path, stamp_path)
+
+
+def _current_stamp(path: Path) -> str | None:
     try:
-        yield session
-        session.commit()
-    except Exception:  # pragma: no cover
-        session.rollback()
-        raise
-    finally:
-        session.close()
+        mtime_ns = path.stat().st_mtime_ns
+    except OSError:
+        return None
+    return f"{SCHEMA_STAMP_VERSION}:{mtime_ns}"
 
 
-def _bootstrap_schema(engine) -> None:
-    """Create tables and apply lightweight migrations when needed."""
-    models.Base.metadata.create_all(engine)
-    _ensure_schema_version(engine)
+def _write_stamp(engine, path: Path, stamp_path: Path) -> None:
+    # In WAL mode the bootstrap writes sit in the -wal file until a checkpoint,
+    # and the one run when the connection closes bumps the main file's mtime
+    # after the stamp was taken, so the stamp would never match on the next
+    # start. Checkpoint first so the recorded mtime is final.
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)")
+    stamp = _current_stamp(path)
+    if stamp is not None:
+        try:
+            stamp_path.write_text(stamp)
+        except OSError:
+            pass
 
 
-def _enable_foreign_keys(dbapi_connection, _connection_record):
+def _read_stamp(stamp_path: Path) -> str | None:
+    try:
+        return stamp_path.read_text()
+    except OSError:
+        return None
+
+
+def _configure_connection(dbapi_connection, _connection_record):
+    global _driver_connection
+    _driver_connection = dbapi_connection
     cursor = dbapi_connection.cursor()
-    cursor.execute("PRAGMA foreign_keys = ON")
+    for pragma in _CONNECTION_PRAGMAS:
+        cursor.execute(pragma)
     cursor.close()
 
 
+def _ensure_indexes(engine) -> None:
+    # create_all skips tables that already exist, so indexes added to the
+    # models later have to be created explicitly on older databases.
+    with engine.begin() as conn:
+        for table in models.Base.metadata.sorted_tables:
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def _ensure_columns(engine) -> None:
+    # Older databases predate these columns; rows written before the upgrade
+    # keep NULL and readers fall back accordingly.
+    with engine.begin() as conn:
+        columns = _table_columns(conn, "config_snapshots")
+        if columns is not None and "rendered_sha256" not in columns:
+            conn.execute(text("ALTER TABLE config_snapshots ADD COLUMN rendered_sha256 VARCHAR(64)"))
+        if columns is not None and "snapshot_format" not in columns:
+            conn.execute(text("ALTER TABLE config_snapshots ADD COLUMN snapshot_format INTEGER"))
+
+
 def _ensure_schema_version(engine) -> None:
     with engine.begin() as conn:
-        columns = _table_columns(engine, "meta")
-        if columns is None:
+        if _table_columns(conn, "meta") is None:
             return
         result = conn.execute(text("SELECT value FROM meta WHERE key = 'schema_version'"))
         if result.fetchone() is None:
@@ -85,15 +234,8 @@ def _ensure_schema_version(engine) -> None:
             )
 
 
-def _table_columns(engine, table_name: str) -> set[str] | None:
-    with engine.connect() as conn:
-        result = conn.execute(
-            text(
-                "SELECT name FROM sqlite_master WHERE type='table' AND name = :name"
-            ),
-            {"name": table_name},
-        )
-        if result.fetchone() is None:
-            return None
-        columns = conn.execute(text(f"PRAGMA table_info({table_name})"))
-        return {row[1] for row in columns}
+def _table_columns(conn, table_name: str) -> set[str] | None:
+    # PRAGMA table_info yields no rows for a missing table, so one query on the
+    # caller's connection answers both "does it exist" and "which columns".
+    columns = {row[1] for row in conn.execute(text(f"PRAGMA table_info({table_name})"))}
+    return columns or None
@@ -1,15 +1,23 @@
 """Compare the SQLite-backed configuration with a target Caddyfile."""
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
-from hashlib import sha256
+from hashlib import file_digest, sha256
 from pathlib import Path
 import difflib
+import io
+import os
+import re
 
-from .exporter import render_caddyfile_text
+from sqlalchemy.orm import Session
+
+from .exporter import render_caddyfile_bytes_and_hash, stored_rendered_hash
 from .helper_runner import stage_caddyfile_copy
 
 MAX_DIFF_LINES = 200
+DIFF_CONTEXT_LINES = 3
+_HUNK_RE = re.compile(r"^@@ -(\d+)(,\d+)? \+(\d+)(,\d+)? @@")
 
 
 @dataclass(slots=True)
@@ -22,9 +30,28 @@ class DriftReport:
     error: str | None
 
 
-def compare_caddyfile(target_path: Path, db_path: Path | None = None) -> DriftReport:
+def compare_caddyfile(
+    target_path: Path,
+    db_path: Path | None = None,
+    *,
+    session: Session | None = None,
+) -> DriftReport:
+    # The digest recorded at import time answers "is there drift?" without
+    # rendering; the text is only built when a diff has to be produced.
+    generated: bytes | None = None
+    target_digest: str | None = None
     try:
-        generated_text = render_caddyfile_text(db_path=db_path)
+        generated_hash = stored_rendered_hash(db_path=db_path, session=session)
+        if generated_hash is None:
+            # file_digest releases the GIL, so hashing the target on a worker
+            # overlaps with the render instead of following it.
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                pending = pool.submit(_hash_file, target_path)
+                generated, generated_hash = render_caddyfile_bytes_and_hash(db_path=db_path, session=session)
+                try:
+                    target_digest = pending.result()
+                except OSError:
+                    target_digest = None
     except Exception as exc:  # pragma: no cover - defensive, surfaces to caller
         return DriftReport(
             target_path=target_path,
@@ -35,10 +62,23 @@ def compare_caddyfile(target_path: Path, db_path: Path | None = None) -> DriftRe
             error=f"Failed to render SQLite data: {exc}",
         )
 
-    generated_hash = sha256(generated_text.encode("utf-8")).hexdigest()
+    if target_digest == generated_hash:
+        return DriftReport(
+            target_path=target_path,
+            in_sync=True,
+            generated_hash=generated_hash,
+            target_hash=target_digest,
+            diff=None,
+            error=None,
+        )
 
+    generated_size = len(generated) if generated is not None else None
     try:
-        target_text = target_path.read_text()
+        if target_digest is None:
+            target_text = _read_target(target_path, generated_size, generated_hash)
+        else:
+            # Already known to differ, so skip straight to reading the text.
+            target_text = _decode(target_path.read_bytes())
     except FileNotFoundError:
         return DriftReport(
             target_path=target_path,
@@ -51,7 +91,7 @@ def compare_caddyfile(target_path: Path, db_path: Path | None = None) -> DriftRe
     except PermissionError:
         staged, command, helper_error = stage_caddyfile_copy(target_path)
         if staged:
-            target_text = staged.read_text()
+            target_text = _read_target(staged, generated_size, generated_hash)
         else:
             hint = f"Permission denied reading {target_path}" if helper_error is None else helper_error
             if command:
@@ -74,7 +114,30 @@ def compare_caddyfile(target_path: Path, db_path: Path | None = None) -> DriftRe
             error=f"Unable to read {target_path}: {exc}",
         )
 
-    target_hash = sha256(target_text.encode("utf-8")).hexdigest()
+    generated_text: str | None = None
+    if target_text is None:
+        target_hash = generated_hash
+    else:
+        if generated is None:
+            try:
+                generated, generated_hash = render_caddyfile_bytes_and_hash(db_path=db_path, session=session)
+            except Exception as exc:  # pragma: no cover - defensive, surfaces to caller
+                return DriftReport(
+                    target_path=target_path,
+                    in_sync=None,
+                    generated_hash=generated_hash,
+                    target_hash=None,
+                    diff=None,
+                    error=f"Failed to render SQLite data: {exc}",
+                )
+        # Text mode normalises newlines, so re-check before reporting drift.
+        # The render is decoded once and compared directly; the target is only
+        # encoded for hashing when it really differs.
+        generated_text = generated.decode("utf-8")
+        if target_text == generated_text:
+            target_hash = generated_hash
+        else:
+            target_hash = sha256(target_text.encode("utf-8")).hexdigest()
 
     if generated_hash == target_hash:
         return DriftReport(
@@ -86,29 +149,93 @@ def compare_caddyfile(target_path: Path, db_path: Path | None = None) -> DriftRe
             error=None,
         )
 
+    diff = _bounded_unified_diff(target_text.splitlines(), generated_text.splitlines(), fromfile=str(target_path))
+
+    return DriftReport(
+        target_path=target_path,
+        in_sync=False,
+        generated_hash=generated_hash,
+        target_hash=target_hash,
+        diff=diff,
+        error=None,
+    )
+
+
+def _bounded_unified_diff(a: list[str], b: list[str], *, fromfile: str) -> str:
+    """Diff only the region between the common prefix and suffix of ``a``/``b``.
+
+    SequenceMatcher is quadratic in the worst case, so feeding it whole files
+    wastes work that MAX_DIFF_LINES truncation throws away. Hunk headers are
+    shifted back to absolute line numbers.
+    """
+    limit = min(len(a), len(b))
+    start = 0
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end_a, end_b = len(a), len(b)
+    while end_a > start and end_b > start and a[end_a - 1] == b[end_b - 1]:
+        end_a -= 1
+        end_b -= 1
+
+    lo = max(0, start - DIFF_CONTEXT_LINES)
+    window_end = start + MAX_DIFF_LINES
+    capped = end_a > window_end or end_b > window_end
+    hi_a = min(len(a), min(end_a, window_end) + DIFF_CONTEXT_LINES)
+    hi_b = min(len(b), min(end_b, window_end) + DIFF_CONTEXT_LINES)
+
     diff_lines = difflib.unified_diff(
-        target_text.splitlines(),
-        generated_text.splitlines(),
-        fromfile=str(target_path),
+        a[lo:hi_a],
+        b[lo:hi_b],
+        fromfile=fromfile,
         tofile="generated",
         lineterm="",
+        n=DIFF_CONTEXT_LINES,
     )
     limited: list[str] = []
     for idx, line in enumerate(diff_lines):
         if idx >= MAX_DIFF_LINES:
             limited.append("... diff truncated ...")
             break
+        if lo and line.startswith("@@"):
+            line = _HUNK_RE.sub(lambda m: _shift_hunk(m, lo), line, count=1)
         limited.append(line)
-    diff = "\n".join(limited)
+    else:
+        if capped:
+            limited.append("... diff truncated ...")
+    return "\n".join(limited)
 
-    return DriftReport(
-        target_path=target_path,
-        in_sync=False,
-        generated_hash=generated_hash,
-        target_hash=target_hash,
-        diff=diff,
-        error=None,
-    )
+
+def _shift_hunk(match: re.Match[str], offset: int) -> str:
+    old_start = int(match.group(1)) + offset
+    new_start = int(match.group(3)) + offset
+    return f"@@ -{old_start}{match.group(2) or ''} +{new_start}{match.group(4) or ''} @@"
+
+
+def _read_target(path: Path, generated_size: int | None, generated_hash: str) -> str | None:
+    """Return the text of ``path``, or ``None`` when its bytes match the render.
+
+    Same-sized files (or any file, when the rendered size is unknown) are
+    stream-hashed first so the common in-sync case never materialises the
+    file in Python; otherwise (or on a mismatch) the bytes are read once and
+    decoded exactly as ``Path.read_text`` would.
+    """
+    with path.open("rb") as handle:
+        if generated_size is None or os.fstat(handle.fileno()).st_size == generated_size:
+            if file_digest(handle, "sha256").hexdigest() == generated_hash:
+                return None
+            handle.seek(0)
+        data = handle.read()
+    return _decode(data)
+
+
+def _hash_file(path: Path) -> str:
+    with path.open("rb") as handle:
+        return file_digest(handle, "sha256").hexdigest()
+
+
+def _decode(data: bytes) -> str:
+    # Same decoding and newline handling as Path.read_text.
+    return io.TextIOWrapper(io.BytesIO(data)).read()
 
 
 def summarise_drift(report: DriftReport) -> str:
@@ -1,25 +1,36 @@
 """Generate Caddy configuration from the database."""
 from __future__ import annotations
 
+from collections import OrderedDict
+from hashlib import sha256
+import os
+import tempfile
 from pathlib import Path
+from typing import Iterator
 
 from sqlalchemy import select
+from sqlalchemy.orm import Session
 
 from . import models
-from .db import session_scope
+from .db import data_fingerprint, session_scope
 from .helper_runner import install_generated_file
 from .config import ensure_cache_dir
-from .importer import DEFAULT_CONFIG_NAME
+from .importer import DEFAULT_CONFIG_NAME, placeholder_block_text
 
 
 class ExportError(RuntimeError):
     pass
 
 
+_RENDER_CACHE_SIZE = 8
+_RENDER_CACHE: OrderedDict[tuple, tuple[bytes, str]] = OrderedDict()
+
+
 def render_caddyfile_text(
     db_path: Path | None = None,
     *,
     snapshot_kind: models.SnapshotKind = models.SNAPSHOT_KIND_CADDY_TUI,
+    session: Session | None = None,
 ) -> str:
     """Render a Caddyfile from the database snapshot as text.
 
@@ -29,44 +40,183 @@ def render_caddyfile_text(
     Args:
         db_path: Optional database path override.
         snapshot_kind: Which snapshot type to render from.
+        session: Optional open session to read from instead of opening a
+            new one, so multi-step workflows share a single connection.
 
     Returns:
         The rendered Caddyfile content as a string.
         Returns empty string if no config or snapshot exists.
     """
-    with session_scope(db_path=db_path) as session:
-        config = session.scalar(select(models.Config).where(models.Config.name == DEFAULT_CONFIG_NAME))
-        if config is None:
-            return ""
-        snapshot = session.scalar(
-            select(models.ConfigSnapshot)
-                .where(
-                    models.ConfigSnapshot.config_id == config.id,
-                    models.ConfigSnapshot.source_kind == snapshot_kind,
-                )
-                .limit(1)
+    return render_caddyfile_bytes(db_path=db_path, snapshot_kind=snapshot_kind, session=session).decode("utf-8")
+
+
+def render_caddyfile_text_and_hash(
+    db_path: Path | None = None,
+    *,
+    snapshot_kind: models.SnapshotKind = models.SNAPSHOT_KIND_CADDY_TUI,
+    session: Session | None = None,
+) -> tuple[str, str]:
+    """Render a snapshot like :func:`render_caddyfile_text` and return its SHA-256.
+
+    Returns:
+        ``(text, sha256_hex)`` for the rendered Caddyfile.
+    """
+    data, digest = render_caddyfile_bytes_and_hash(db_path=db_path, snapshot_kind=snapshot_kind, session=session)
+    return data.decode("utf-8"), digest
+
+
+def render_caddyfile_bytes(
+    db_path: Path | None = None,
+    *,
+    snapshot_kind: models.SnapshotKind = models.SNAPSHOT_KIND_CADDY_TUI,
+    session: Session | None = None,
+) -> bytes:
+    """Render a snapshot as UTF-8 bytes, ready to hash or write to disk."""
+    return render_caddyfile_bytes_and_hash(db_path=db_path, snapshot_kind=snapshot_kind, session=session)[0]
+
+
+def render_caddyfile_bytes_and_hash(
+    db_path: Path | None = None,
+    *,
+    snapshot_kind: models.SnapshotKind = models.SNAPSHOT_KIND_CADDY_TUI,
+    session: Session | None = None,
+) -> tuple[bytes, str]:
+    """Render a snapshot as UTF-8 bytes together with their SHA-256.
+
+    Results are memoised on :func:`caddy_tui.db.data_fingerprint`, so repeated
+    renders of an unchanged database skip the SQL read, the encode and the
+    hash.
+
+    Returns:
+        ``(data, sha256_hex)`` for the rendered Caddyfile.
+    """
+    key = (data_fingerprint(db_path, session=session), snapshot_kind)
+    cached = _RENDER_CACHE.get(key)
+    if cached is not None:
+        _RENDER_CACHE.move_to_end(key)
+        return cached
+    result = _render_snapshot(db_path, snapshot_kind, session)
+    _RENDER_CACHE[key] = result
+    if len(_RENDER_CACHE) > _RENDER_CACHE_SIZE:
+        _RENDER_CACHE.popitem(last=False)
+    return result
+
+
+def stored_rendered_hash(
+    db_path: Path | None = None,
+    *,
+    snapshot_kind: models.SnapshotKind = models.SNAPSHOT_KIND_CADDY_TUI,
+    session: Session | None = None,
+) -> str | None:
+    """Return the SHA-256 recorded for a snapshot's rendering when it was written.
+
+    This is a single-row lookup, so callers that only need the digest can
+    skip rendering. Returns ``None`` when no snapshot exists or it predates
+    the column.
+    """
+    if session is None:
+        with session_scope(db_path=db_path) as own_session:
+            return stored_rendered_hash(snapshot_kind=snapshot_kind, session=own_session)
+    return session.scalar(
+        select(models.ConfigSnapshot.rendered_sha256)
+            .join(models.Config)
+            .where(
+                models.Config.name == DEFAULT_CONFIG_NAME,
+                models.ConfigSnapshot.source_kind == snapshot_kind,
+            )
+            .limit(1)
+    )
+
+
+def iter_caddyfile_chunks(
+    db_path: Path | None = None,
+    *,
+    snapshot_kind: models.SnapshotKind = models.SNAPSHOT_KIND_CADDY_TUI,
+    session: Session | None = None,
+) -> Iterator[str]:
+    """Yield the rendered Caddyfile piece by piece.
+
+    Emits each block's prelude, fragments (or a synthesised placeholder) and
+    postlude in order, so callers can stream the output without building the
+    whole text. Yields nothing if no config or snapshot exists. When
+    ``session`` is given it is used as-is and left open for the caller.
+    """
+    if session is None:
+        with session_scope(db_path=db_path) as own_session:
+            yield from iter_caddyfile_chunks(snapshot_kind=snapshot_kind, session=own_session)
+        return
+    snapshot_id = _snapshot_id(session, snapshot_kind)
+    if snapshot_id is not None:
+        yield from _iter_snapshot_chunks(session, snapshot_id)
+
+
+def _snapshot_id(session: Session, snapshot_kind: models.SnapshotKind) -> int | None:
+    return session.scalar(
+        select(models.ConfigSnapshot.id)
+            .join(models.Config)
+            .where(
+                models.Config.name == DEFAULT_CONFIG_NAME,
+                models.ConfigSnapshot.source_kind == snapshot_kind,
+            )
+            .limit(1)
+    )
+
+
+def _render_snapshot(
+    db_path: Path | None,
+    snapshot_kind: models.SnapshotKind,
+    session: Session | None = None,
+) -> tuple[bytes, str]:
+    # Each chunk is encoded exactly once; the same bytes feed the hash and
+    # the output buffer.
+    hashed = sha256()
+    buf = bytearray()
+    for chunk in iter_caddyfile_chunks(db_path, snapshot_kind=snapshot_kind, session=session):
+        data = chunk.encode("utf-8")
+        hashed.update(data)
+        buf += data
+    return bytes(buf), hashed.hexdigest()
+
+
+def _iter_snapshot_chunks(session: Session, snapshot_id: int) -> Iterator[str]:
+    # One flat outer join, ordered by the composite indexes, yields plain
+    # tuples; no ORM objects are built. A block without fragments comes back
+    # as a single row with a NULL content and gets a placeholder.
+    rows = session.execute(
+        select(
+            models.ServerBlock.id,
+            models.ServerBlock.raw_prelude,
+            models.ServerBlock.raw_postlude,
+            models.RawFragment.content,
         )
-        if snapshot is None:
-            return ""
-        chunks: list[str] = []
-        for block in sorted(snapshot.server_blocks, key=lambda b: b.block_index):
-            if block.raw_prelude:
-                chunks.append(block.raw_prelude)
-            fragments = sorted(block.fragments, key=lambda f: f.fragment_index)
-            if fragments:
-                chunks.extend(fragment.content for fragment in fragments)
-            else:
-                chunks.append(_synthesise_block(block))
-            if block.raw_postlude:
-                chunks.append(block.raw_postlude)
-        return "".join(chunks)
+            .outerjoin(models.RawFragment, models.RawFragment.block_id == models.ServerBlock.id)
+            .where(models.ServerBlock.snapshot_id == snapshot_id)
+            .order_by(models.ServerBlock.block_index, models.RawFragment.fragment_index)
+    )
+    current_id = None
+    postlude = None
+    for block_id, prelude, block_postlude, content in rows:
+        if block_id != current_id:
+            if postlude:
+                yield postlude
+            current_id, postlude = block_id, block_postlude
+            if prelude:
+                yield prelude
+        if content is None:
+            yield _synthesise_block(session, block_id)
+        else:
+            yield content
+    if postlude:
+        yield postlude
 
 
-def _synthesise_block(block: models.ServerBlock) -> str:
-    labels = ", ".join(site.raw_label for site in sorted(block.sites, key=lambda s: s.label_index))
-    header = f"{labels} {{\n" if labels else "{\n"
-    body = "    respond \"caddy-tui placeholder\"\n"
-    return header + body + "}\n"
+def _synthesise_block(session: Session, block_id: int) -> str:
+    labels = session.scalars(
+        select(models.ServerBlockSite.raw_label)
+            .where(models.ServerBlockSite.block_id == block_id)
+            .order_by(models.ServerBlockSite.label_index)
+    ).all()
+    return placeholder_block_text(labels)
 
 
 def generate_caddyfile(
@@ -74,6 +224,7 @@ def generate_caddyfile(
     db_path: Path | None = None,
     *,
     snapshot_kind: models.SnapshotKind = models.SNAPSHOT_KIND_CADDY_TUI,
+    session: Session | None = None,
 ) -> Path:
     """Generate a Caddyfile from the database and write it to disk.
 
@@ -84,6 +235,7 @@ def generate_caddyfile(
         target: Path to write the generated Caddyfile to.
         db_path: Optional database path override.
         snapshot_kind: Which snapshot type to generate from.
+        session: Optional open session to read from instead of opening a new one.
 
     Returns:
         The path where the file was written.
@@ -91,17 +243,63 @@ def generate_caddyfile(
     Raises:
         PermissionError: When the file cannot be written and helper fails.
     """
-    data = render_caddyfile_text(db_path=db_path, snapshot_kind=snapshot_kind)
+    # Render before touching the target: a render or DB error then leaves the
+    # existing file intact and is never mistaken for a write permission problem.
+    data = render_caddyfile_bytes(db_path, snapshot_kind=snapshot_kind, session=session)
     try:
-        target.write_text(data)
+        _replace_file(target, data)
     except PermissionError:
         cache = ensure_cache_dir() / "generated"
         cache.mkdir(parents=True, exist_ok=True)
         staged = cache / target.name
-        staged.write_text(data)
+        _replace_file(staged, data)
         success, command, error = install_generated_file(staged, target)
         if not success:
             detail = error or "Helper install failed"
             hint = f"Run: {command}" if command else "Run helper install manually"
             raise PermissionError(f"Unable to write {target}: {detail}. {hint}")
     return target
+
+
+def _replace_file(path: Path, data: bytes) -> None:
+    # Write a sibling temp file and rename it over the target, so a failed
+    # write never leaves a truncated or partial Caddyfile in place. Symlinks
+    # are resolved so the link itself is kept and its target is replaced.
+    path = Path(os.path.realpath(path))
+    try:
+        existing = path.stat()
+    except FileNotFoundError:
+        existing = None
+    # Renaming needs a writable directory (a writable file is enough to write in
+    # place, e.g. /etc/caddy/Caddyfile), and the replacement must keep the old
+    # file's owner and group, or the caddy service may lose read access.
+    if not os.access(path.parent, os.W_OK | os.X_OK):
+        path.write_bytes(data)
+        return
+    fd, temp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as handle:
+            handle.write(data)
+            if existing is None:
+                os.fchmod(handle.fileno(), 0o666 & ~_current_umask())
+            else:
+                if (existing.st_uid, existing.st_gid) != (os.getuid(), os.getgid()):
+                    try:
+                        os.fchown(handle.fileno(), existing.st_uid, existing.st_gid)
+                    except PermissionError:
+                        handle.close()
+                        Path(temp_name).unlink(missing_ok=True)
+                        path.write_bytes(data)
+                        return
+                # After fchown, which clears set-id bits.
+                os.fchmod(handle.fileno(), existing.st_mode & 0o7777)
+        os.replace(temp_name, path)
+    except BaseException:
+        Path(temp_name).unlink(missing_ok=True)
+        raise
+
+
+def _current_umask() -> int:
+    mask = os.umask(0)
+    os.umask(mask)
+    return mask
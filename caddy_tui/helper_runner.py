@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from functools import cache
 from pathlib import Path
 import os
 import shlex
@@ -31,6 +32,7 @@ class HelperInvocationError(RuntimeError):
         self.stderr = stderr
 
 
+@cache
 def _resolve_helper_bin() -> str:
     """Return an absolute path for the helper executable."""
     helper_path = Path(HELPER_BIN)
@@ -44,11 +46,23 @@ def _resolve_helper_bin() -> str:
     raise FileNotFoundError(f"Unable to locate helper executable '{HELPER_BIN}' in PATH")
 
 
-def _build_base_command(non_interactive: bool = True) -> list[str]:
+@cache
+def _resolve_sudo_bin() -> str:
     if not shutil.which(SUDO_BIN):
         raise FileNotFoundError(f"Unable to locate sudo executable '{SUDO_BIN}'")
+    return SUDO_BIN
+
+
+def _invalidate_helper_cache() -> None:
+    """Forget resolved helper/sudo paths (e.g. after changing HELPER_BIN or SUDO_BIN)."""
+    _resolve_helper_bin.cache_clear()
+    _resolve_sudo_bin.cache_clear()
+
+
+def _build_base_command(non_interactive: bool = True) -> list[str]:
+    sudo_bin = _resolve_sudo_bin()
     helper_bin = _resolve_helper_bin()
-    command = [SUDO_BIN]
+    command = [sudo_bin]
     if non_interactive:
         command.append("-n")
     command.append(helper_bin)
@@ -57,10 +71,13 @@ def _build_base_command(non_interactive: bool = True) -> list[str]:
 
 def _run_helper(args: list[str], *, capture_output: bool = False) -> HelperCommand | tuple[HelperCommand, str]:
     command = HelperCommand(args)
+    # Only keep stdout when the caller wants it; stderr is always captured for
+    # error reporting.
+    stdout = subprocess.PIPE if capture_output else subprocess.DEVNULL
     try:
-        proc = subprocess.run(args, capture_output=True, text=True, check=True)
+        proc = subprocess.run(args, stdout=stdout, stderr=subprocess.PIPE, text=True, check=True)
     except subprocess.CalledProcessError as exc:  # pragma: no cover - relies on sudo
-        raise HelperInvocationError(command, exc.stderr.strip() or exc.stdout.strip()) from exc
+        raise HelperInvocationError(command, (exc.stderr or "").strip() or (exc.stdout or "").strip()) from exc
     if capture_output:
         return command, (proc.stdout or "").strip()
     return command
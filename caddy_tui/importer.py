@@ -3,16 +3,21 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timezone
-from hashlib import sha256
+from functools import lru_cache
+from hashlib import blake2b, sha256
 from pathlib import Path
 from typing import Any, Sequence
-import json
+import io
+import mmap
 import os
+import sqlite3
+import stat
+import time
 
-from sqlalchemy import select
+from sqlalchemy import delete, insert, select
 
-from . import models
-from .caddyfile_parser import ParsedBlock, parse_caddyfile_text
+from . import _json, models
+from .caddyfile_parser import ParsedBlock, fingerprint, parse_caddyfile_text
 from .caddy_integration import adapt_caddyfile
 from .db import session_scope
 from .helper_runner import stage_caddyfile_copy
@@ -27,42 +32,46 @@ DEFAULT_CADDYFILE_PATHS: tuple[Path, ...] = (
 
 MAX_PARENT_SEARCH_DEPTH = 5
 
+_SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35)
+
+_FIND_CACHE_TTL = 5.0
+_FIND_CACHE: dict[tuple[str | None, tuple[Path, ...]], tuple[Path, float]] = {}
+
 
 def _generate_candidate_paths(explicit: Path) -> list[Path]:
     """Return a list of nearby paths that might contain a Caddyfile."""
     path = explicit.expanduser()
-    candidates: list[Path] = []
-    seen: set[Path] = set()
-
-    def add(candidate: Path) -> None:
-        candidate = candidate.expanduser()
-        if candidate not in seen:
-            seen.add(candidate)
-            candidates.append(candidate)
-
-    add(path)
+    candidates = [path]
 
     if path.name and path.name.lower() != "caddyfile":
-        add(path.with_name("Caddyfile"))
-    add(path / "Caddyfile")
+        candidates.append(path.with_name("Caddyfile"))
+    candidates.append(path / "Caddyfile")
 
     current = path.parent
     depth = 0
     while depth < MAX_PARENT_SEARCH_DEPTH and current != current.parent:
-        add(current / "Caddyfile")
+        candidates.append(current / "Caddyfile")
         current = current.parent
         depth += 1
 
-    return candidates
+    return list(dict.fromkeys(candidate.expanduser() for candidate in candidates))
 
 
 def _resolve_explicit_path(explicit: Path) -> Path | None:
     for candidate in _generate_candidate_paths(explicit):
-        if candidate.exists() and candidate.is_file():
+        if _is_regular_file(candidate):
             return candidate
     return None
 
 
+def _is_regular_file(path: Path) -> bool:
+    # One stat per candidate instead of exists() followed by is_file().
+    try:
+        return stat.S_ISREG(os.stat(path).st_mode)
+    except (OSError, ValueError):
+        return False
+
+
 class CaddyfilePermissionError(PermissionError):
     """Raised when the Caddyfile cannot be read due to permissions."""
 
@@ -85,7 +94,9 @@ def find_caddyfile(explicit: Path | None = None) -> Path:
     """Locate a Caddyfile to import.
 
     If an explicit path is provided, search nearby locations for a matching
-    Caddyfile. Otherwise fall back to the default search paths.
+    Caddyfile. Otherwise fall back to the default search paths. Results are
+    reused for ``_FIND_CACHE_TTL`` seconds while the cached path is still a
+    regular file, so refresh loops skip the search.
 
     Args:
         explicit: Optional path hint to search from.
@@ -96,12 +107,26 @@ def find_caddyfile(explicit: Path | None = None) -> Path:
     Raises:
         FileNotFoundError: When no Caddyfile can be located.
     """
+    key = (str(explicit) if explicit else None, DEFAULT_CADDYFILE_PATHS)
+    cached = _FIND_CACHE.get(key)
+    if cached is not None and cached[1] > time.monotonic() and _is_regular_file(cached[0]):
+        return cached[0]
+    resolved = _search_caddyfile(explicit)
+    _FIND_CACHE[key] = (resolved, time.monotonic() + _FIND_CACHE_TTL)
+    return resolved
+
+
+def _invalidate_find_cache() -> None:
+    _FIND_CACHE.clear()
+
+
+def _search_caddyfile(explicit: Path | None) -> Path:
     if explicit:
         resolved = _resolve_explicit_path(explicit)
         if resolved:
             return resolved
     for candidate in DEFAULT_CADDYFILE_PATHS:
-        if candidate.exists():
+        if _is_regular_file(candidate):
             return candidate
     raise FileNotFoundError("Unable to locate a Caddyfile to import")
 
@@ -117,6 +142,14 @@ class ImportSummary:
 
 DEFAULT_CONFIG_NAME = "default"
 
+# Bump whenever parsing, normalisation or the stored block layout changes, so
+# snapshots built by an older release are rebuilt even from unchanged sources.
+SNAPSHOT_FORMAT_VERSION = 1
+
+_JSON_STREAM_THRESHOLD = 8 * 1024 * 1024
+_JSON_HASH_BATCH = 64 * 1024
+_MMAP_THRESHOLD = 1024 * 1024
+
 
 def import_caddyfile(
     path: Path | None = None,
@@ -150,12 +183,12 @@ def import_caddyfile(
     adapted_source = _ensure_accessible_source(source, helper_interactive=helper_interactive)
     adapt_caddyfile(adapted_source)  # validation only
 
-    text = adapted_source.read_text()
-    parsed = parse_caddyfile_text(text)
+    text, hashed = _read_source(adapted_source)
+    parsed = parse_caddyfile_text(text, digest=hashed.digest())
     if not parsed.blocks:
         raise ValueError("No server blocks detected in Caddyfile")
 
-    digest = sha256(text.encode("utf-8")).hexdigest()
+    digest = hashed.hexdigest()
     collected_at = datetime.now(timezone.utc)
     timestamp = collected_at.isoformat(timespec="seconds")
 
@@ -216,11 +249,14 @@ def import_caddyfile_text(
         ValueError: When the text contains no server blocks.
         RuntimeError: When require_config is True and no config exists.
     """
-    parsed = parse_caddyfile_text(text)
+    # Hash once and hand the digest to the parser so its cache lookup does
+    # not encode and hash the text a second time.
+    hashed = fingerprint(text.encode("utf-8"))
+    parsed = parse_caddyfile_text(text, digest=hashed.digest())
     if not parsed.blocks:
         raise ValueError("No server blocks detected in Caddyfile text")
 
-    digest = sha256(text.encode("utf-8")).hexdigest()
+    digest = hashed.hexdigest()
     collected_at = datetime.now(timezone.utc)
     timestamp = collected_at.isoformat(timespec="seconds")
     labels: list[str] = _summarise_block_labels(parsed.blocks)
@@ -256,6 +292,7 @@ def import_caddy_json_payload(
     mirror_to: Sequence[models.SnapshotKind] | None = None,
     db_path: Path | None = None,
     require_config: bool = False,
+    size_hint: int | None = None,
 ) -> ImportSummary | None:
     """Import Caddy configuration from a JSON payload.
 
@@ -269,6 +306,8 @@ def import_caddy_json_payload(
         mirror_to: Additional snapshot types to mirror the import to.
         db_path: Optional database path override.
         require_config: If True, raise an error if no config exists.
+        size_hint: Length of the serialised payload, for callers passing a
+            dict they decoded themselves (defaults to ``len(payload)`` for strings).
 
     Returns:
         ImportSummary with import statistics.
@@ -277,10 +316,11 @@ def import_caddy_json_payload(
         RuntimeError: When require_config is True and no config exists.
         json.JSONDecodeError: When payload is a string with invalid JSON.
     """
-    data = json.loads(payload) if isinstance(payload, str) else payload
+    data = _json.loads(payload) if isinstance(payload, str) else payload
     blocks = blocks_from_caddy_json(data)
-    normalised_text = json.dumps(data, sort_keys=True)
-    digest = sha256(normalised_text.encode("utf-8")).hexdigest()
+    if size_hint is None:
+        size_hint = len(payload) if isinstance(payload, str) else 0
+    digest = _json_fingerprint(data, size_hint=size_hint)
     collected_at = datetime.now(timezone.utc)
     labels: list[str] = _summarise_block_labels(blocks)
     snapshots_written = _unique_kinds(target_snapshot, mirror_to)
@@ -307,6 +347,62 @@ def import_caddy_json_payload(
     )
 
 
+def _read_source(path: Path) -> tuple[str, blake2b]:
+    """Return the decoded text of ``path`` and the fingerprint of that text.
+
+    The file is read once as bytes. Without carriage returns the decoded text
+    encodes back to exactly those bytes, so they are hashed directly instead
+    of re-encoding the text; otherwise newlines are normalised as in text mode
+    and the result is hashed. Files of at least ``_MMAP_THRESHOLD`` bytes are
+    mapped instead, so hashing and decoding both read the page cache without
+    an intermediate bytes copy.
+    """
+    with path.open("rb") as handle:
+        if os.fstat(handle.fileno()).st_size >= _MMAP_THRESHOLD:
+            try:
+                mapped = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+            except (OSError, ValueError):
+                mapped = None
+            if mapped is not None:
+                with mapped:
+                    if mapped.find(b"\r") == -1:
+                        return str(mapped, "utf-8"), fingerprint(mapped)
+        raw = handle.read()
+    if b"\r" not in raw:
+        return raw.decode("utf-8"), fingerprint(raw)
+    text = io.TextIOWrapper(io.BytesIO(raw), encoding="utf-8").read()
+    return text, fingerprint(text.encode("utf-8"))
+
+
+def _json_fingerprint(data: Any, *, size_hint: int = 0) -> str:
+    """Fingerprint the canonical (sorted-key) JSON encoding of ``data``.
+
+    With orjson the encoding goes straight to bytes and is hashed in one go.
+    Otherwise payloads known to be larger than ``_JSON_STREAM_THRESHOLD`` are
+    encoded and hashed in batches rather than materialised as one string.
+    Streaming goes through the pure-Python encoder, so smaller payloads keep
+    using the much faster one-shot C encoder. Both stdlib paths produce the
+    same digest. The streaming encoder is only needed on this rare path, so
+    ``json`` is imported here rather than at module import time.
+    """
+    if _json.HAS_ORJSON or size_hint < _JSON_STREAM_THRESHOLD:
+        return fingerprint(_json.dumps_canonical(data)).hexdigest()
+    import json
+
+    hashed = fingerprint()
+    pending: list[str] = []
+    pending_size = 0
+    for chunk in json.JSONEncoder(**_json.CANONICAL_OPTIONS).iterencode(data):
+        pending.append(chunk)
+        pending_size += len(chunk)
+        if pending_size >= _JSON_HASH_BATCH:
+            hashed.update("".join(pending).encode("utf-8"))
+            pending.clear()
+            pending_size = 0
+    hashed.update("".join(pending).encode("utf-8"))
+    return hashed.hexdigest()
+
+
 def _ensure_accessible_source(source: Path, *, helper_interactive: bool = False) -> Path:
     if os.access(source, os.R_OK):
         return source
@@ -358,49 +454,112 @@ def _write_snapshot(
         snapshot = models.ConfigSnapshot(config=config, source_kind=kind)
         session.add(snapshot)
         session.flush()
+    elif (
+        source_hash is not None
+        and snapshot.source_hash == source_hash
+        and snapshot.rendered_sha256 is not None
+        and snapshot.snapshot_format == SNAPSHOT_FORMAT_VERSION
+    ):
+        # Same source content and format as last time: the stored blocks are
+        # already current, so only record when (and from where) it was collected.
+        snapshot.source_path = source_path
+        snapshot.collected_at = collected_at
+        return
     snapshot.source_path = source_path
     snapshot.source_hash = source_hash
+    snapshot.rendered_sha256 = _rendered_sha256(blocks)
+    snapshot.snapshot_format = SNAPSHOT_FORMAT_VERSION
     snapshot.collected_at = collected_at
-    snapshot.server_blocks.clear()
-
-    for index, block in enumerate(blocks):
-        _store_block(snapshot, index, block)
-
-
-def _store_block(snapshot: models.ConfigSnapshot, index: int, block: ParsedBlock) -> models.ServerBlock:
-    block_model = models.ServerBlock(
-        snapshot=snapshot,
-        block_index=index,
-        is_global=block.is_global,
-        raw_prelude=block.raw_prelude or None,
-        raw_postlude=block.raw_postlude or None,
-    )
-    snapshot.server_blocks.append(block_model)
-
-    for label_index, raw_label in enumerate(block.labels):
-        host, port, scheme, is_ipv6, is_wildcard = _analyse_label(raw_label)
-        block_model.sites.append(
-            models.ServerBlockSite(
-                raw_label=raw_label,
-                host=host,
-                port=port,
-                scheme=scheme,
-                is_ipv6=is_ipv6,
-                is_wildcard=is_wildcard,
-                label_index=label_index,
+    session.flush()
+    # One DELETE; ON DELETE CASCADE removes the blocks' sites, fragments and
+    # directives inside SQLite instead of the ORM deleting them row by row.
+    session.execute(delete(models.ServerBlock).where(models.ServerBlock.snapshot_id == snapshot.id))
+    _insert_blocks(session, snapshot.id, blocks)
+    session.expire(snapshot, ["server_blocks"])
+
+
+def placeholder_block_text(labels: Sequence[str]) -> str:
+    """Return the stand-in rendered for a block that has no stored fragments."""
+    joined = ", ".join(labels)
+    prefix = f"{joined} " if joined else ""
+    return f"{prefix}{{\n    respond \"caddy-tui placeholder\"\n}}\n"
+
+
+def _rendered_sha256(blocks: Sequence[ParsedBlock]) -> str:
+    # Mirrors the exporter's output for these blocks, so drift checks can
+    # compare against the stored digest without re-rendering the snapshot.
+    hashed = sha256()
+    update = hashed.update
+    for block in blocks:
+        if block.raw_prelude:
+            update(block.raw_prelude.encode("utf-8"))
+        if block.fragments:
+            for fragment in block.fragments:
+                update(fragment.content.encode("utf-8"))
+        else:
+            update(placeholder_block_text(block.labels).encode("utf-8"))
+        if block.raw_postlude:
+            update(block.raw_postlude.encode("utf-8"))
+    return hashed.hexdigest()
+
+
+def _insert_blocks(session, snapshot_id: int, blocks: list[ParsedBlock]) -> None:
+    """Bulk insert ``blocks`` and their sites/fragments with one statement per table."""
+    if not blocks:
+        return
+    block_rows = [
+        {
+            "snapshot_id": snapshot_id,
+            "block_index": index,
+            "is_global": block.is_global,
+            "raw_prelude": block.raw_prelude or None,
+            "raw_postlude": block.raw_postlude or None,
+        }
+        for index, block in enumerate(blocks)
+    ]
+    if _SQLITE_HAS_RETURNING:
+        block_ids = session.scalars(
+            insert(models.ServerBlock).returning(models.ServerBlock.id, sort_by_parameter_order=True),
+            block_rows,
+        ).all()
+    else:
+        # RETURNING arrived in SQLite 3.35; older libraries get ids via per-row flushes.
+        orm_blocks = [models.ServerBlock(**row) for row in block_rows]
+        session.add_all(orm_blocks)
+        session.flush()
+        block_ids = [orm_block.id for orm_block in orm_blocks]
+
+    site_rows: list[dict[str, Any]] = []
+    fragment_rows: list[dict[str, Any]] = []
+    for block_id, block in zip(block_ids, blocks):
+        for label_index, raw_label in enumerate(block.labels):
+            host, port, scheme, is_ipv6, is_wildcard = _analyse_label(raw_label)
+            site_rows.append(
+                {
+                    "block_id": block_id,
+                    "raw_label": raw_label,
+                    "host": host,
+                    "port": port,
+                    "scheme": scheme,
+                    "is_ipv6": is_ipv6,
+                    "is_wildcard": is_wildcard,
+                    "label_index": label_index,
+                }
             )
-        )
-
-    for fragment_index, fragment in enumerate(block.fragments):
-        block_model.fragments.append(
-            models.RawFragment(
-                fragment_index=fragment_index,
-                kind=fragment.kind,
-                content=fragment.content,
+        for fragment_index, fragment in enumerate(block.fragments):
+            fragment_rows.append(
+                {
+                    "block_id": block_id,
+                    "fragment_index": fragment_index,
+                    "kind": fragment.kind,
+                    "content": fragment.content,
+                }
             )
-        )
 
-    return block_model
+    if site_rows:
+        session.execute(insert(models.ServerBlockSite), site_rows)
+    if fragment_rows:
+        session.execute(insert(models.RawFragment), fragment_rows)
 
 
 def _summarise_block_labels(blocks: list[ParsedBlock]) -> list[str]:
@@ -430,7 +589,11 @@ def _unique_kinds(
     return tuple(seen)
 
 
+@lru_cache(maxsize=4096)
 def _analyse_label(raw: str) -> tuple[str | None, int | None, str | None, bool, bool]:
+    if ":" not in raw and not raw.startswith("["):
+        # Bare hostnames are the common case and need none of the splitting.
+        return raw or None, None, None, False, "*" in raw
     scheme: str | None = None
     host_port = raw
     if "://" in raw:
@@ -2,11 +2,13 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
-from typing import Any, Iterable
-import json
+from typing import Any, Iterable, Iterator
 
+from . import _json
 from .caddyfile_parser import ParsedBlock, ParsedFragment
 
+_PREFIXED_MATCHER_KEYS = (("path", "path"), ("paths", "path"), ("method", "method"), ("methods", "method"))
+
 
 @dataclass(slots=True)
 class NormalisedRoute:
@@ -17,96 +19,86 @@ class NormalisedRoute:
 
 
 def blocks_from_caddy_json(payload: str | dict[str, Any]) -> list[ParsedBlock]:
-    data = json.loads(payload) if isinstance(payload, str) else payload
+    return list(iter_blocks_from_caddy_json(payload))
+
+
+def iter_blocks_from_caddy_json(payload: str | dict[str, Any]) -> Iterator[ParsedBlock]:
+    """Yield one block per route, serialising each route only when it is reached.
+
+    Callers that look at each block once can let it go before the next route
+    is serialised instead of holding every rendered route at the same time.
+    Route fragments are only ever parsed back, so they use the compact
+    canonical encoding; the whole-config fallback is shown as-is and stays
+    pretty-printed.
+    """
+    data = _json.loads(payload) if isinstance(payload, str) else payload
     http_app = (_get_dict(data, "apps") or {}).get("http", {})
     servers = _get_dict(http_app, "servers") or {}
 
-    blocks: list[ParsedBlock] = []
+    emitted = False
     for server_name in sorted(servers.keys()):
         server = servers.get(server_name) or {}
         routes = server.get("routes") or []
         for index, route in enumerate(routes):
             labels = _labels_for_route(server_name, server, route, index)
-            blocks.append(
-                ParsedBlock(
-                    labels=labels,
-                    is_global=len(labels) == 0,
-                    raw_prelude=f"# server: {server_name} route: {index}\n",
-                    raw_postlude="",
-                    fragments=[
-                        ParsedFragment(
-                            kind="json_route",
-                            content=json.dumps(route, sort_keys=True, indent=2),
-                        )
-                    ],
-                )
-            )
-
-    if not blocks:
-        blocks.append(
-            ParsedBlock(
-                labels=[],
-                is_global=True,
-                raw_prelude="",
+            emitted = True
+            yield ParsedBlock(
+                labels=labels,
+                is_global=len(labels) == 0,
+                raw_prelude=f"# server: {server_name} route: {index}\n",
                 raw_postlude="",
                 fragments=[
                     ParsedFragment(
-                        kind="json_config",
-                        content=json.dumps(data, sort_keys=True, indent=2),
+                        kind="json_route",
+                        content=_json.dumps_canonical(route).decode("utf-8"),
                     )
                 ],
             )
-        )
 
-    return blocks
+    if not emitted:
+        yield ParsedBlock(
+            labels=[],
+            is_global=True,
+            raw_prelude="",
+            raw_postlude="",
+            fragments=[
+                ParsedFragment(
+                    kind="json_config",
+                    content=_json.dumps_pretty(data),
+                )
+            ],
+        )
 
 
 def _labels_for_route(server_name: str, server: dict[str, Any], route: dict[str, Any], index: int) -> list[str]:
-    labels: list[str] = []
-    matchers = route.get("match") or []
-    for matcher in matchers:
-        labels.extend(_extract_hosts(matcher))
-        labels.extend(_prefix_list(matcher.get("path"), "path"))
-        labels.extend(_prefix_list(matcher.get("paths"), "path"))
-        labels.extend(_prefix_list(matcher.get("method"), "method"))
-        labels.extend(_prefix_list(matcher.get("methods"), "method"))
-
+    # dict.fromkeys dedupes in order while consuming the generator, so no
+    # per-matcher lists are built.
+    labels = dict.fromkeys(_iter_matcher_labels(route.get("match") or ()))
     if not labels:
-        listeners = server.get("listen") or []
-        labels.extend(str(listener) for listener in listeners if listener)
-
+        labels = dict.fromkeys(str(listener) for listener in server.get("listen") or () if listener)
     if not labels:
-        labels.append(f"{server_name}::route{index}")
-
-    return _dedupe_preserve_order(labels)
-
+        return [f"{server_name}::route{index}"]
+    return list(labels)
 
-def _extract_hosts(matcher: dict[str, Any]) -> list[str]:
-    hosts = matcher.get("host") or matcher.get("hosts") or []
-    return [str(host) for host in hosts if host]
 
-
-def _prefix_list(values: Any, prefix: str) -> list[str]:
-    if values is None:
-        return []
-    if isinstance(values, str):
-        values = [values]
-    if not isinstance(values, Iterable):  # pragma: no cover - guard rail
-        return []
-    return [f"{prefix}:{value}" for value in values if value]
+def _iter_matcher_labels(matchers: Iterable[dict[str, Any]]) -> Iterator[str]:
+    for matcher in matchers:
+        for host in matcher.get("host") or matcher.get("hosts") or ():
+            if host:
+                yield str(host)
+        for key, prefix in _PREFIXED_MATCHER_KEYS:
+            values = matcher.get(key)
+            if values is None:
+                continue
+            if isinstance(values, str):
+                values = (values,)
+            elif not isinstance(values, Iterable):  # pragma: no cover - guard rail
+                continue
+            for value in values:
+                if value:
+                    yield f"{prefix}:{value}"
 
 
 def _get_dict(data: dict[str, Any], key: str) -> dict[str, Any] | None:
     node = data.get(key)
     return node if isinstance(node, dict) else None
-
-
-def _dedupe_preserve_order(items: Iterable[str]) -> list[str]:
-    seen: set[str] = set()
-    ordered: list[str] = []
-    for item in items:
-        if item in seen:
-            continue
-        seen.add(item)
-        ordered.append(item)
-    return ordered
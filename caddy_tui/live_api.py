@@ -2,12 +2,27 @@
 from __future__ import annotations
 
 from dataclasses import dataclass
+from http.client import HTTPConnection, HTTPException, HTTPResponse, HTTPSConnection
+from typing import Any, Callable
 from urllib.error import HTTPError, URLError
-from urllib.request import Request, urlopen
-import json
+from urllib.parse import urljoin, urlsplit
+import io
 
+from . import _json
 from .caddyfile_parser import parse_caddyfile_text
 
+MAX_RESPONSE_BYTES = 32 * 1024 * 1024
+
+_ERROR_BODY_LIMIT = 64 * 1024
+_REDIRECT_STATUSES = frozenset({301, 302, 303, 307, 308})
+# Caddy answers /config with a redirect to /config/; a couple of hops is plenty.
+_MAX_REDIRECTS = 4
+_REQUEST_HEADERS = {"Accept": "text/caddyfile, text/plain, application/json"}
+# Idle keep-alive connections by (scheme, netloc). A caller pops one before
+# use and puts it back once the response has been read in full, so two
+# concurrent polls never share a socket.
+_IDLE_CONNECTIONS: dict[tuple[str, str], HTTPConnection] = {}
+
 
 @dataclass(slots=True)
 class LiveApiStatus:
@@ -16,34 +31,140 @@ class LiveApiStatus:
     caddyfile_text: str | None
     format: str
     json_payload: str | None = None
+    # The decoded ``json_payload``, kept so importing it does not parse again.
+    json_data: dict[str, Any] | None = None
     error: str | None = None
 
 
 def fetch_live_status(endpoint: str | None, *, timeout: float = 2.5) -> LiveApiStatus | None:
     if not endpoint:
         return None
-    request = Request(endpoint)
-    request.add_header("Accept", "text/caddyfile, text/plain, application/json")
     try:
-        with urlopen(request, timeout=timeout) as response:
+        with _open_response(endpoint, timeout=timeout) as response:
             content_type = response.headers.get("Content-Type", "")
-            raw = response.read().decode("utf-8", errors="replace")
+            length = response.headers.get("Content-Length", "")
+            if length.isdigit() and int(length) > MAX_RESPONSE_BYTES:
+                return _too_large(f"{length} bytes")
+            # Chunked responses carry no length, so the read itself is capped.
+            raw = response.read(MAX_RESPONSE_BYTES + 1)
+            if len(raw) > MAX_RESPONSE_BYTES:
+                return _too_large(f"over {MAX_RESPONSE_BYTES} bytes")
     except HTTPError as exc:  # pragma: no cover - depends on live service
         detail = exc.read().decode("utf-8", errors="replace")
         return LiveApiStatus(state="down", block_count=None, caddyfile_text=None, format="http", json_payload=None, error=detail or str(exc))
     except URLError as exc:  # pragma: no cover - depends on live service
         return LiveApiStatus(state="down", block_count=None, caddyfile_text=None, format="network", json_payload=None, error=str(exc))
 
-    lowered = content_type.lower()
-    if "caddyfile" in lowered or "text/plain" in lowered:
-        return _from_caddyfile(raw)
-    if "json" in lowered:
-        return _from_json(raw)
+    # JSON is parsed straight from the response bytes; only the text kept on
+    # the status object is decoded.
+    mime = content_type.partition(";")[0].strip().lower()
+    handler = _MIME_HANDLERS.get(mime) or _sniff_handler(mime, raw)
+    return handler(raw)
+
+
+def _too_large(size: str) -> LiveApiStatus:
+    return LiveApiStatus(
+        state="live",
+        block_count=None,
+        caddyfile_text=None,
+        format="http",
+        json_payload=None,
+        error=f"Admin API response too large ({size})",
+    )
+
+
+def close_live_connections() -> None:
+    """Close any idle admin-API connections kept for reuse."""
+    while _IDLE_CONNECTIONS:
+        _, connection = _IDLE_CONNECTIONS.popitem()
+        connection.close()
+
+
+class _PooledResponse:
+    """Context manager that returns the connection to the pool once drained."""
+
+    def __init__(self, key: tuple[str, str], connection: HTTPConnection, response: HTTPResponse):
+        self._key = key
+        self._connection = connection
+        self._response = response
+        self.headers = response.headers
+
+    def read(self, amt: int | None = None) -> bytes:
+        return self._response.read(amt)
+
+    def __enter__(self) -> _PooledResponse:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        if exc_type is None and self._response.isclosed() and not self._response.will_close:
+            stale = _IDLE_CONNECTIONS.pop(self._key, None)
+            _IDLE_CONNECTIONS[self._key] = self._connection
+            if stale is not None:
+                stale.close()
+        else:
+            self._connection.close()
+        return False
+
+
+def _open_response(endpoint: str, *, timeout: float, redirects: int = _MAX_REDIRECTS) -> _PooledResponse:
+    """GET ``endpoint`` over a kept-alive connection, raising like ``urlopen``.
+
+    Redirects are followed up to ``_MAX_REDIRECTS`` hops and any other
+    non-2xx status raises ``HTTPError``. Unlike ``urlopen`` the
+    ``http_proxy``/``https_proxy``/``no_proxy`` variables are not consulted:
+    the admin API is a local endpoint and is always contacted directly.
+    """
+    parts = urlsplit(endpoint)
+    if parts.scheme not in {"http", "https"}:
+        raise URLError(f"unsupported URL scheme: {parts.scheme or endpoint}")
+    key = (parts.scheme, parts.netloc)
+    path = parts.path or "/"
+    if parts.query:
+        path = f"{path}?{parts.query}"
+    connection = _IDLE_CONNECTIONS.pop(key, None)
+    # A pooled socket may have been closed by the server while idle, so a
+    # failure on a reused connection is retried once on a fresh one.
+    for reused in ((True, False) if connection is not None else (False,)):
+        if not reused:
+            factory = HTTPSConnection if parts.scheme == "https" else HTTPConnection
+            connection = factory(parts.netloc, timeout=timeout)
+        elif connection.sock is not None:
+            connection.sock.settimeout(timeout)
+        try:
+            connection.request("GET", path, headers=_REQUEST_HEADERS)
+            response = connection.getresponse()
+        except (HTTPException, OSError) as exc:
+            connection.close()
+            if reused:
+                continue
+            raise URLError(exc) from exc
+        break
+    location = response.headers.get("Location")
+    if response.status in _REDIRECT_STATUSES and location and redirects > 0:
+        # Drain the (small) redirect body so the connection can be pooled.
+        with _PooledResponse(key, connection, response) as redirect:
+            redirect.read(_ERROR_BODY_LIMIT)
+        return _open_response(urljoin(endpoint, location), timeout=timeout, redirects=redirects - 1)
+    if not 200 <= response.status < 300:
+        detail = response.read(_ERROR_BODY_LIMIT)
+        connection.close()
+        raise HTTPError(endpoint, response.status, response.reason, response.headers, io.BytesIO(detail))
+    return _PooledResponse(key, connection, response)
+
+
+def _sniff_handler(mime: str, raw: bytes) -> Callable[[bytes], LiveApiStatus]:
+    if "caddyfile" in mime or "text/plain" in mime:
+        return _from_caddyfile_bytes
+    if "json" in mime:
+        return _from_json
     # Best effort: try to guess based on payload
-    stripped = raw.lstrip()
-    if stripped.startswith("{"):
-        return _from_json(raw)
-    return _from_caddyfile(raw)
+    if raw.lstrip().startswith(b"{"):
+        return _from_json
+    return _from_caddyfile_bytes
+
+
+def _from_caddyfile_bytes(raw: bytes) -> LiveApiStatus:
+    return _from_caddyfile(raw.decode("utf-8", errors="replace"))
 
 
 def _from_caddyfile(text: str) -> LiveApiStatus:
@@ -58,13 +179,28 @@ def _from_caddyfile(text: str) -> LiveApiStatus:
     return LiveApiStatus(state="live", block_count=block_count, caddyfile_text=text, format="caddyfile", json_payload=None)
 
 
-def _from_json(payload: str) -> LiveApiStatus:
+def _from_json(raw: bytes) -> LiveApiStatus:
+    payload = raw.decode("utf-8", errors="replace")
     try:
-        data = json.loads(payload)
-    except json.JSONDecodeError as exc:  # pragma: no cover - JSON parsing validated elsewhere
+        data = _json.loads(raw)
+    except ValueError as exc:  # pragma: no cover - JSONDecodeError and UnicodeDecodeError
         return LiveApiStatus(state="live", block_count=None, caddyfile_text=None, format="json", json_payload=payload, error=str(exc))
     block_count = _count_http_routes(data)
-    return LiveApiStatus(state="live", block_count=block_count, caddyfile_text=None, format="json", json_payload=payload)
+    return LiveApiStatus(
+        state="live",
+        block_count=block_count,
+        caddyfile_text=None,
+        format="json",
+        json_payload=payload,
+        json_data=data if isinstance(data, dict) else None,
+    )
+
+
+_MIME_HANDLERS: dict[str, Callable[[bytes], LiveApiStatus]] = {
+    "text/caddyfile": _from_caddyfile_bytes,
+    "text/plain": _from_caddyfile_bytes,
+    "application/json": _from_json,
+}
 
 
 def _count_http_routes(data: dict) -> int | None:
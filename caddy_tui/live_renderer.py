@@ -1,14 +1,17 @@
 """Render live snapshot JSON routes into Caddyfile-style text."""
 from __future__ import annotations
 
-from typing import Any, Iterable
-import json
+from functools import lru_cache
+from typing import Any, Callable, Iterable
 
-from . import models
+from . import _json, models
 
 
 INDENT_SPACES = 4
-REDIRECT_CODES = {301, 302, 303, 307, 308}
+# Pre-built indents for the first 16 nesting levels, so rendering reuses the
+# same strings instead of allocating a new one for every line.
+_INDENTS = tuple(" " * width for width in range(INDENT_SPACES * 16 + 1))
+REDIRECT_CODES: frozenset[int] = frozenset({301, 302, 303, 307, 308})
 
 
 def render_live_block_like_caddyfile(block: models.ServerBlock) -> str | None:
@@ -16,74 +19,105 @@ def render_live_block_like_caddyfile(block: models.ServerBlock) -> str | None:
     fragment = _first_json_route_fragment(block)
     if fragment is None:
         return None
+    body_text = _render_route_text(fragment.content, _block_header_line(block))
+    if body_text is None:
+        return None
+    return f"{block.raw_prelude or ''}{body_text}{block.raw_postlude or ''}"
+
+
+@lru_cache(maxsize=256)
+def _render_route_text(content: str, header: str) -> str | None:
+    # Keyed on the fragment text itself, so repaints of an unchanged block
+    # skip the JSON parse and tree walk and entries can never go stale.
     try:
-        route = json.loads(fragment.content)
-    except json.JSONDecodeError:
+        route = _json.loads(content)
+    except ValueError:  # json.JSONDecodeError and orjson.JSONDecodeError
         return None
     if not isinstance(route, dict):
         return None
 
-    header = _block_header_line(block)
-    body_lines = _render_route_body(route, indent=INDENT_SPACES)
-    if not body_lines:
-        body_lines = [_indent(INDENT_SPACES) + "# no handlers"]
-
-    lines = [header, *body_lines, "}"]
-    body_text = "\n".join(lines) + "\n"
-    return f"{block.raw_prelude or ''}{body_text}{block.raw_postlude or ''}"
+    lines = [header]
+    _render_route_body(route, INDENT_SPACES, lines)
+    if len(lines) == 1:
+        lines.append(_indent(INDENT_SPACES) + "# no handlers")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
 
 
 def _first_json_route_fragment(block: models.ServerBlock) -> models.RawFragment | None:
-    for fragment in sorted(block.fragments, key=lambda f: f.fragment_index):
-        if fragment.kind == "json_route":
-            return fragment
-    return None
+    # The relationship already loads fragments ordered by fragment_index.
+    return next((fragment for fragment in block.fragments if fragment.kind == "json_route"), None)
 
 
 def _block_header_line(block: models.ServerBlock) -> str:
-    labels = [
-        site.raw_label.strip()
-        for site in sorted(block.sites, key=lambda s: s.label_index)
-        if site.raw_label and site.raw_label.strip()
-    ]
+    labels = [site.raw_label.strip() for site in block.sites if site.raw_label and site.raw_label.strip()]
     if labels:
         return f"{', '.join(labels)} {{"
     return "{"
 
 
-def _render_route_body(route: dict[str, Any], *, indent: int) -> list[str]:
-    lines: list[str] = []
-    lines.extend(_match_comment_lines(route, indent))
+# Work items for _render_route_body: (kind, value, extra).
+_ROUTE = 0  # value: route dict, extra: indent
+_HANDLE = 1  # value: handler entry, extra: indent
+_LINE = 2  # value: finished line
+_OPEN = 3  # value: opening line, extra: cell recording len(out) after it
+_NO_HANDLERS = 4  # value: that cell, extra: indent of the nested body
+
+
+def _render_route_body(route: dict[str, Any], indent: int, out: list[str]) -> None:
+    # Nested routes are walked with an explicit stack instead of recursion, so
+    # deeply nested subroutes neither pay a Python frame per level nor run
+    # into the recursion limit. Items are pushed in reverse so they pop in
+    # output order, and every line is appended to the caller's ``out``.
+    stack: list[tuple[int, Any, Any]] = [(_ROUTE, route, indent)]
+    while stack:
+        kind, value, extra = stack.pop()
+        if kind == _LINE:
+            out.append(value)
+        elif kind == _HANDLE:
+            handler = _handler_name(value)
+            expand = _NESTED_HANDLERS.get(handler)
+            if expand is None:
+                _render_handle_entry(handler, value, extra, out)
+            else:
+                stack.extend(reversed(expand(value, extra)))
+        elif kind == _ROUTE:
+            stack.extend(reversed(_route_items(value, extra, out)))
+        elif kind == _OPEN:
+            out.append(value)
+            extra[0] = len(out)
+        elif len(out) == value[0]:  # _NO_HANDLERS
+            out.append(_indent(extra) + "# no handlers")
+
+
+def _route_items(route: dict[str, Any], indent: int, out: list[str]) -> list[tuple[int, Any, Any]]:
+    _match_comment_lines(route, indent, out)
     if route.get("terminal"):
-        lines.append(_indent(indent) + "# terminal")
+        out.append(_indent(indent) + "# terminal")
 
     handles = _handle_entries(route)
-    if not handles:
-        nested_routes = route.get("routes")
-        if isinstance(nested_routes, list):
-            for nested in nested_routes:
-                lines.append(_indent(indent) + "handle {")
-                lines.extend(_render_route_body(nested, indent=indent + INDENT_SPACES))
-                lines.append(_indent(indent) + "}")
-        return lines
-
-    for entry in handles:
-        lines.extend(_render_handle_entry(entry, indent))
-    return lines
-
-
-def _match_comment_lines(route: dict[str, Any], indent: int) -> list[str]:
+    if handles:
+        return [(_HANDLE, entry, indent) for entry in handles]
+    items: list[tuple[int, Any, Any]] = []
+    nested_routes = route.get("routes")
+    if isinstance(nested_routes, list):
+        for nested in nested_routes:
+            items.append((_LINE, _indent(indent) + "handle {", None))
+            items.append((_ROUTE, nested, indent + INDENT_SPACES))
+            items.append((_LINE, _indent(indent) + "}", None))
+    return items
+
+
+def _match_comment_lines(route: dict[str, Any], indent: int, out: list[str]) -> None:
     matchers = route.get("match")
     if not isinstance(matchers, list):
-        return []
-    lines: list[str] = []
+        return
     for matcher in matchers:
         if not isinstance(matcher, dict):
             continue
         desc = _describe_matcher(matcher)
         if desc:
-            lines.append(_indent(indent) + f"# match {desc}")
-    return lines
+            out.append(_indent(indent) + f"# match {desc}")
 
 
 def _describe_matcher(matcher: dict[str, Any]) -> str:
@@ -113,58 +147,46 @@ def _handle_entries(node: dict[str, Any]) -> list[dict[str, Any]]:
     return []
 
 
-def _render_handle_entry(entry: dict[str, Any], indent: int) -> list[str]:
-    handler = (entry.get("handler") or "").lower()
-    if handler == "subroute":
-        return _render_subroute(entry, indent)
-    if handler == "reverse_proxy":
-        return [_indent(indent) + _render_reverse_proxy(entry)]
-    if handler == "static_response":
-        return _render_static_response(entry, indent)
-    if handler == "encode":
-        return [_indent(indent) + _render_encode(entry)]
-    if handler == "file_server":
-        return _render_file_server(entry, indent)
-    if handler in {"headers", "header"}:
-        return _render_header(entry, indent)
-    if handler == "php_fastcgi":
-        return _render_php_fastcgi(entry, indent)
-    if handler == "handle_response":
-        return _render_handle_response(entry, indent)
-    if handler == "rewrite":
-        return _render_rewrite(entry, indent)
-    if handler == "copy_response_headers":
-        return _render_copy_response_headers(entry, indent)
-    if handler == "request_body":
-        return _render_request_body(entry, indent)
-    return [_indent(indent) + f"# handler {handler or 'unknown'}"]
-
-
-def _render_subroute(entry: dict[str, Any], indent: int) -> list[str]:
+def _handler_name(entry: dict[str, Any]) -> str:
+    handler = entry.get("handler") or ""
+    # Caddy emits handler names in lower case, so known names are matched as
+    # they are and only anything else is folded.
+    if handler in _KNOWN_HANDLERS:
+        return handler
+    return handler.lower()
+
+
+def _render_handle_entry(handler: str, entry: dict[str, Any], indent: int, out: list[str]) -> None:
+    render = _HANDLE_RENDERERS.get(handler)
+    if render is None:
+        out.append(_indent(indent) + f"# handler {handler or 'unknown'}")
+        return
+    render(entry, indent, out)
+
+
+def _subroute_items(entry: dict[str, Any], indent: int) -> list[tuple[int, Any, Any]]:
     routes = entry.get("routes")
-    if not isinstance(routes, list):
-        return [_indent(indent) + "handle {}"]
-    lines: list[str] = []
-    for route in routes:
-        if not isinstance(route, dict):
-            continue
-        lines.append(_indent(indent) + "handle {")
-        nested_lines = _render_route_body(route, indent=indent + INDENT_SPACES)
-        if not nested_lines:
-            nested_lines = [_indent(indent + INDENT_SPACES) + "# no handlers"]
-        lines.extend(nested_lines)
-        lines.append(_indent(indent) + "}")
-    if not lines:
-        lines.append(_indent(indent) + "handle {}")
-    return lines
-
-
-def _render_reverse_proxy(entry: dict[str, Any]) -> str:
+    items: list[tuple[int, Any, Any]] = []
+    if isinstance(routes, list):
+        for route in routes:
+            if not isinstance(route, dict):
+                continue
+            body_start = [0]
+            items.append((_OPEN, _indent(indent) + "handle {", body_start))
+            items.append((_ROUTE, route, indent + INDENT_SPACES))
+            items.append((_NO_HANDLERS, body_start, indent + INDENT_SPACES))
+            items.append((_LINE, _indent(indent) + "}", None))
+    if not items:
+        items.append((_LINE, _indent(indent) + "handle {}", None))
+    return items
+
+
+def _render_reverse_proxy(entry: dict[str, Any], indent: int, out: list[str]) -> None:
     targets = _reverse_proxy_targets(entry)
     line = "reverse_proxy"
     if targets:
         line += " " + " ".join(targets)
-    return line
+    out.append(_indent(indent) + line)
 
 
 def _reverse_proxy_targets(entry: dict[str, Any]) -> list[str]:
@@ -180,22 +202,24 @@ def _reverse_proxy_targets(entry: dict[str, Any]) -> list[str]:
     return targets
 
 
-def _render_static_response(entry: dict[str, Any], indent: int) -> list[str]:
-    headers = entry.get("headers") or {}
-    location = _first_header_value(headers, "Location")
+def _render_static_response(entry: dict[str, Any], indent: int, out: list[str]) -> None:
     status_code = entry.get("status_code")
     body = entry.get("body") or entry.get("content")
-    if location and isinstance(status_code, int) and status_code in REDIRECT_CODES and not body:
-        return [_indent(indent) + f"redir {location} {status_code}"]
+    # Only redirect-shaped responses need the Location header looked up.
+    if not body and isinstance(status_code, int) and status_code in REDIRECT_CODES:
+        location = _first_header_value(entry.get("headers") or {}, "Location")
+        if location:
+            out.append(_indent(indent) + f"redir {location} {status_code}")
+            return
     pieces: list[str] = ["respond"]
     if body:
         pieces.append(_quote(str(body)))
     if status_code:
         pieces.append(str(status_code))
-    return [_indent(indent) + " ".join(pieces)]
+    out.append(_indent(indent) + " ".join(pieces))
 
 
-def _render_encode(entry: dict[str, Any]) -> str:
+def _render_encode(entry: dict[str, Any], indent: int, out: list[str]) -> None:
     value = entry.get("encodings") or entry.get("formats")
     names: list[str] = []
     if isinstance(value, dict):
@@ -205,86 +229,107 @@ def _render_encode(entry: dict[str, Any]) -> str:
     line = "encode"
     if names:
         line += " " + " ".join(names)
-    return line
+    out.append(_indent(indent) + line)
 
 
-def _render_file_server(entry: dict[str, Any], indent: int) -> list[str]:
+def _render_file_server(entry: dict[str, Any], indent: int, out: list[str]) -> None:
     line = "file_server"
     if entry.get("browse"):
         line += " browse"
-    lines = [_indent(indent) + line]
+    out.append(_indent(indent) + line)
     root = entry.get("root")
     if isinstance(root, str) and root:
-        lines.append(_indent(indent + INDENT_SPACES) + f"root {root}")
+        out.append(_indent(indent + INDENT_SPACES) + f"root {root}")
     index = entry.get("index")
     if isinstance(index, list):
         for value in index:
-            lines.append(_indent(indent + INDENT_SPACES) + f"index {value}")
+            out.append(_indent(indent + INDENT_SPACES) + f"index {value}")
     elif isinstance(index, str) and index:
-        lines.append(_indent(indent + INDENT_SPACES) + f"index {index}")
-    return lines
+        out.append(_indent(indent + INDENT_SPACES) + f"index {index}")
 
 
-def _render_header(entry: dict[str, Any], indent: int) -> list[str]:
+def _render_header(entry: dict[str, Any], indent: int, out: list[str]) -> None:
     response = entry.get("response") or {}
     set_headers = response.get("set") or entry.get("set")
-    lines: list[str] = []
+    start = len(out)
     if isinstance(set_headers, dict):
         for key, values in set_headers.items():
             for value in _string_list(values):
-                lines.append(_indent(indent) + f"header {key} {_quote(value)}")
-    if not lines:
-        lines.append(_indent(indent) + "header /* configure headers */")
-    return lines
+                out.append(_indent(indent) + f"header {key} {_quote(value)}")
+    if len(out) == start:
+        out.append(_indent(indent) + "header /* configure headers */")
 
 
-def _render_php_fastcgi(entry: dict[str, Any], indent: int) -> list[str]:
+def _render_php_fastcgi(entry: dict[str, Any], indent: int, out: list[str]) -> None:
     upstream = entry.get("upstream") or entry.get("address")
     line = "php_fastcgi"
     if isinstance(upstream, str) and upstream:
         line += f" {upstream}"
-    lines = [_indent(indent) + line]
+    out.append(_indent(indent) + line)
     root = entry.get("root")
     if isinstance(root, str) and root:
-        lines.append(_indent(indent + INDENT_SPACES) + f"root {root}")
-    return lines
+        out.append(_indent(indent + INDENT_SPACES) + f"root {root}")
 
 
-def _render_handle_response(entry: dict[str, Any], indent: int) -> list[str]:
+def _handle_response_items(entry: dict[str, Any], indent: int) -> list[tuple[int, Any, Any]]:
     routes = entry.get("routes")
-    if not isinstance(routes, list):
-        return [_indent(indent) + "handle_response {}"]
-    lines: list[str] = []
-    for route in routes:
-        if not isinstance(route, dict):
-            continue
-        lines.append(_indent(indent) + "handle_response {")
-        lines.extend(_render_route_body(route, indent=indent + INDENT_SPACES))
-        lines.append(_indent(indent) + "}")
-    if not lines:
-        lines.append(_indent(indent) + "handle_response {}")
-    return lines
-
-
-def _render_rewrite(entry: dict[str, Any], indent: int) -> list[str]:
+    items: list[tuple[int, Any, Any]] = []
+    if isinstance(routes, list):
+        for route in routes:
+            if not isinstance(route, dict):
+                continue
+            items.append((_LINE, _indent(indent) + "handle_response {", None))
+            items.append((_ROUTE, route, indent + INDENT_SPACES))
+            items.append((_LINE, _indent(indent) + "}", None))
+    if not items:
+        items.append((_LINE, _indent(indent) + "handle_response {}", None))
+    return items
+
+
+def _render_rewrite(entry: dict[str, Any], indent: int, out: list[str]) -> None:
     destination = entry.get("to") or entry.get("uri")
     if isinstance(destination, str) and destination:
-        return [_indent(indent) + f"rewrite {destination}"]
-    return [_indent(indent) + "rewrite"]
+        out.append(_indent(indent) + f"rewrite {destination}")
+    else:
+        out.append(_indent(indent) + "rewrite")
 
 
-def _render_copy_response_headers(entry: dict[str, Any], indent: int) -> list[str]:
+def _render_copy_response_headers(entry: dict[str, Any], indent: int, out: list[str]) -> None:
     headers = entry.get("headers")
     if isinstance(headers, list):
         joined = " ".join(headers)
-        return [_indent(indent) + f"copy_response_headers {joined}"]
-    return [_indent(indent) + "copy_response_headers"]
+        out.append(_indent(indent) + f"copy_response_headers {joined}")
+    else:
+        out.append(_indent(indent) + "copy_response_headers")
 
 
-def _render_request_body(entry: dict[str, Any], indent: int) -> list[str]:
+def _render_request_body(entry: dict[str, Any], indent: int, out: list[str]) -> None:
     if entry.get("action") == "replace" and isinstance(entry.get("value"), str):
-        return [_indent(indent) + f"request_body replace {_quote(entry['value'])}"]
-    return [_indent(indent) + "request_body"]
+        out.append(_indent(indent) + f"request_body replace {_quote(entry['value'])}")
+    else:
+        out.append(_indent(indent) + "request_body")
+
+
+_HANDLE_RENDERERS: dict[str, Callable[[dict[str, Any], int, list[str]], None]] = {
+    "reverse_proxy": _render_reverse_proxy,
+    "static_response": _render_static_response,
+    "encode": _render_encode,
+    "file_server": _render_file_server,
+    "headers": _render_header,
+    "header": _render_header,
+    "php_fastcgi": _render_php_fastcgi,
+    "rewrite": _render_rewrite,
+    "copy_response_headers": _render_copy_response_headers,
+    "request_body": _render_request_body,
+}
+
+# Handlers whose nested routes _render_route_body expands onto its stack.
+_NESTED_HANDLERS: dict[str, Callable[[dict[str, Any], int], list[tuple[int, Any, Any]]]] = {
+    "subroute": _subroute_items,
+    "handle_response": _handle_response_items,
+}
+
+_KNOWN_HANDLERS = frozenset(_HANDLE_RENDERERS) | frozenset(_NESTED_HANDLERS)
 
 
 def _first_header_value(headers: dict[str, Any], key: str) -> str | None:
@@ -301,6 +346,11 @@ def _first_header_value(headers: dict[str, Any], key: str) -> str | None:
 def _string_list(value: Any) -> list[str]:
     if value is None:
         return []
+    # Decoded JSON yields plain lists, so check the concrete types before the
+    # much slower Iterable ABC check.
+    value_type = type(value)
+    if value_type is list or value_type is tuple:
+        return [entry for entry in value if isinstance(entry, str) and entry]
     if isinstance(value, str):
         return [value]
     if isinstance(value, Iterable):
@@ -313,9 +363,13 @@ def _string_list(value: Any) -> list[str]:
 
 
 def _quote(value: str) -> str:
+    if '"' not in value:
+        return f'"{value}"'
     escaped = value.replace('"', '\\"')
     return f'"{escaped}"'
 
 
 def _indent(width: int) -> str:
+    if width < len(_INDENTS):
+        return _INDENTS[width]
     return " " * width
@@ -2,9 +2,11 @@
 from __future__ import annotations
 
 from datetime import datetime, timezone
-from typing import Any, Literal
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Callable, Literal
 
-from sqlalchemy import Boolean, DateTime, ForeignKey, Integer, String, Text, UniqueConstraint
+from sqlalchemy import Boolean, DateTime, ForeignKey, Index, Integer, String, Text, UniqueConstraint, func
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -12,6 +14,19 @@ def _utcnow() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _db_timestamp(*, refresh_on_update: bool = False) -> Any:
+    # Bookkeeping timestamps are filled in by SQLite (CURRENT_TIMESTAMP, UTC)
+    # inside the INSERT/UPDATE itself rather than by a Python call per row.
+    # The SQL default is sent explicitly as well as declared in the DDL, since
+    # tables created by older versions have no DEFAULT clause.
+    return mapped_column(
+        DateTime(timezone=True),
+        default=func.now(),
+        server_default=func.now(),
+        onupdate=func.now() if refresh_on_update else None,
+    )
+
+
 class Base(DeclarativeBase):
     pass
 
@@ -53,9 +68,11 @@ class ConfigSnapshot(Base):
     source_label: Mapped[str | None] = mapped_column(String(64))
     source_path: Mapped[str | None] = mapped_column(Text())
     source_hash: Mapped[str | None] = mapped_column(String(128))
+    rendered_sha256: Mapped[str | None] = mapped_column(String(64))
+    snapshot_format: Mapped[int | None] = mapped_column(Integer)
     collected_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow)
+    created_at: Mapped[datetime] = _db_timestamp()
+    updated_at: Mapped[datetime] = _db_timestamp(refresh_on_update=True)
 
     config: Mapped[Config] = relationship(back_populates="snapshots")
     server_blocks: Mapped[list[ServerBlock]] = relationship(
@@ -67,6 +84,7 @@ class ConfigSnapshot(Base):
 
 class ServerBlock(Base):
     __tablename__ = "server_blocks"
+    __table_args__ = (Index("ix_server_blocks_snapshot_order", "snapshot_id", "block_index"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     snapshot_id: Mapped[int] = mapped_column(ForeignKey("config_snapshots.id", ondelete="CASCADE"), index=True)
@@ -74,8 +92,8 @@ class ServerBlock(Base):
     is_global: Mapped[bool] = mapped_column(Boolean, default=False)
     raw_prelude: Mapped[str | None] = mapped_column(Text())
     raw_postlude: Mapped[str | None] = mapped_column(Text())
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow)
+    created_at: Mapped[datetime] = _db_timestamp()
+    updated_at: Mapped[datetime] = _db_timestamp(refresh_on_update=True)
 
     snapshot: Mapped[ConfigSnapshot] = relationship(back_populates="server_blocks")
     sites: Mapped[list[ServerBlockSite]] = relationship(
@@ -97,6 +115,7 @@ class ServerBlock(Base):
 
 class ServerBlockSite(Base):
     __tablename__ = "server_block_sites"
+    __table_args__ = (Index("ix_server_block_sites_block_order", "block_id", "label_index"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     block_id: Mapped[int] = mapped_column(ForeignKey("server_blocks.id", ondelete="CASCADE"), index=True)
@@ -113,6 +132,7 @@ class ServerBlockSite(Base):
 
 class Directive(Base):
     __tablename__ = "directives"
+    __table_args__ = (Index("ix_directives_block_order", "block_id", "line_index"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     block_id: Mapped[int] = mapped_column(ForeignKey("server_blocks.id", ondelete="CASCADE"), index=True)
@@ -123,8 +143,8 @@ class Directive(Base):
     raw_trailing: Mapped[str | None] = mapped_column(Text())
     has_block: Mapped[bool] = mapped_column(Boolean, default=False)
     raw_block_body: Mapped[str | None] = mapped_column(Text())
-    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow)
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow)
+    created_at: Mapped[datetime] = _db_timestamp()
+    updated_at: Mapped[datetime] = _db_timestamp(refresh_on_update=True)
 
     block: Mapped[ServerBlock] = relationship(back_populates="directives")
     args: Mapped[list[DirectiveArg]] = relationship(
@@ -141,6 +161,7 @@ class Directive(Base):
 
 class DirectiveArg(Base):
     __tablename__ = "directive_args"
+    __table_args__ = (Index("ix_directive_args_directive_order", "directive_id", "arg_index"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     directive_id: Mapped[int] = mapped_column(ForeignKey("directives.id", ondelete="CASCADE"), index=True)
@@ -152,6 +173,7 @@ class DirectiveArg(Base):
 
 class DirectiveKeyValue(Base):
     __tablename__ = "directive_kv"
+    __table_args__ = (Index("ix_directive_kv_directive_order", "directive_id", "kv_index"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     directive_id: Mapped[int] = mapped_column(ForeignKey("directives.id", ondelete="CASCADE"), index=True)
@@ -165,6 +187,7 @@ class DirectiveKeyValue(Base):
 
 class RawFragment(Base):
     __tablename__ = "raw_fragments"
+    __table_args__ = (Index("ix_raw_fragments_block_order", "block_id", "fragment_index"),)
 
     id: Mapped[int] = mapped_column(primary_key=True)
     block_id: Mapped[int] = mapped_column(ForeignKey("server_blocks.id", ondelete="CASCADE"), index=True)
@@ -180,9 +203,18 @@ class Meta(Base):
 
     key: Mapped[str] = mapped_column(String(64), primary_key=True)
     value: Mapped[str | None] = mapped_column(Text())
-    updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), default=_utcnow, onupdate=_utcnow)
+    updated_at: Mapped[datetime] = _db_timestamp(refresh_on_update=True)
 
 
 def to_dict(instance: Base) -> dict[str, Any]:
     """Return a dictionary of column values for debugging."""
-    return {column.key: getattr(instance, column.key) for column in instance.__table__.columns}
+    keys, getter = _column_getter(type(instance))
+    values = getter(instance)
+    return dict(zip(keys, values if len(keys) > 1 else (values,)))
+
+
+@lru_cache(maxsize=None)
+def _column_getter(cls: type[Base]) -> tuple[tuple[str, ...], Callable[[Any], Any]]:
+    # Resolved once per mapped class; attrgetter then reads every column in C.
+    keys = tuple(column.key for column in cls.__table__.columns)
+    return keys, attrgetter(*keys)
@@ -6,14 +6,23 @@ without giving the TUI full root access.
 """
 from __future__ import annotations
 
+import errno
 import os
-import shutil
 import stat
-import subprocess
+import sys
 from pathlib import Path
 
 import click
 
+# Every helper call is a fresh interpreter started through sudo, so modules
+# only some commands need (json, shlex, shutil, subprocess) are imported
+# inside those commands rather than here.
+
+_COPY_CHUNK = 1 << 30
+# copy_file_range is refused for cross-device copies on older kernels and by
+# some filesystems; those cases fall back to shutil.copy2.
+_COPY_FALLBACK_ERRNOS = frozenset({errno.ENOSYS, errno.EXDEV, errno.EINVAL, errno.EOPNOTSUPP})
+
 
 @click.group()
 def main() -> None:
@@ -27,46 +36,90 @@ def main() -> None:
 @click.option("--group", type=int, required=True, help="Target file group GID")
 def mirror(source: Path, dest: Path, owner: int, group: int) -> None:
     """Copy a root-owned Caddyfile into an unprivileged staging area."""
+    import shutil
+
     dest.parent.mkdir(parents=True, exist_ok=True)
-    shutil.copy2(source, dest)
-    os.chown(dest, owner, group)
+    if _copy_in_kernel(source, dest, owner, group):
+        shutil.copystat(source, dest)
+    else:
+        shutil.copy2(source, dest)
+        os.chown(dest, owner, group)
     click.echo(f"Mirrored {source} -> {dest}")
 
 
+def _copy_in_kernel(source: Path, dest: Path, owner: int, group: int) -> bool:
+    """Copy ``source`` into ``dest`` with copy_file_range, owned by ``owner``:``group``.
+
+    The destination is handed over through its descriptor before any data is
+    written. Returns False when the platform or filesystem cannot do the copy,
+    leaving ``dest`` for the caller to overwrite.
+    """
+    if not hasattr(os, "copy_file_range"):
+        return False
+    src_fd = os.open(source, os.O_RDONLY)
+    try:
+        dst_fd = os.open(dest, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        try:
+            os.fchown(dst_fd, owner, group)
+            while os.copy_file_range(src_fd, dst_fd, _COPY_CHUNK):
+                pass
+        except OSError as exc:
+            if exc.errno in _COPY_FALLBACK_ERRNOS:
+                return False
+            raise
+        finally:
+            os.close(dst_fd)
+    finally:
+        os.close(src_fd)
+    return True
+
+
 @main.command()
 @click.option("--source", type=click.Path(exists=True, dir_okay=False, path_type=Path), required=True)
 @click.option("--dest", type=click.Path(dir_okay=False, path_type=Path), required=True)
 @click.option("--mode", type=str, default="0o644")
 def install(source: Path, dest: Path, mode: str) -> None:
     """Install a generated Caddyfile into /etc with controlled permissions."""
+    import shutil
+
     dest.parent.mkdir(parents=True, exist_ok=True)
     shutil.copy2(source, dest)
     os.chmod(dest, int(mode, 8))
     click.echo(f"Installed {source} -> {dest}")
 
 
+def _run_service_command(command: str) -> None:
+    """Replace the helper process with the shell-style ``command``.
+
+    The caller sees the command's exit status directly.
+    """
+    import shlex
+
+    parts = shlex.split(command)
+    sys.stdout.flush()
+    os.execvp(parts[0], parts)
+
+
 @main.command()
 @click.option("--command", default="systemctl reload caddy", help="Reload command to execute.")
 def reload(command: str) -> None:
     """Reload the running Caddy daemon."""
-    parts = command.split()
-    subprocess.run(parts, check=True)
-    click.echo("Reloaded Caddy")
+    _run_service_command(command)
 
 
 @main.command()
 @click.option("--command", default="systemctl restart caddy", help="Restart command to execute.")
 def restart(command: str) -> None:
     """Restart the Caddy daemon when it is not running."""
-    parts = command.split()
-    subprocess.run(parts, check=True)
-    click.echo("Restarted Caddy")
+    _run_service_command(command)
 
 
 @main.command(name="status")
 @click.option("--command", default="systemctl is-active caddy", help="Command that reports Caddy service state.")
 def status_cmd(command: str) -> None:
     """Report whether Caddy is live or down."""
+    import subprocess
+
     parts = command.split()
     proc = subprocess.run(parts, capture_output=True, text=True, check=False)
     output = (proc.stdout or "").strip()
@@ -1,20 +1,19 @@
 """Helpers for working with configuration snapshots."""
 from __future__ import annotations
 
-from collections import deque
-from dataclasses import dataclass
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import Any, Iterable
 import json
-import tempfile
 from hashlib import sha256
 
 from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 
 from . import models
-from .caddy_integration import CaddyError, adapt_caddyfile
-from .json_normalizer import blocks_from_caddy_json
+from .caddy_integration import STDIN_CONFIG_PATH, CaddyError, adapt_caddyfile_text
+from .json_normalizer import iter_blocks_from_caddy_json
 from .db import session_scope
 from .importer import DEFAULT_CONFIG_NAME
 from .live_renderer import render_live_block_like_caddyfile
@@ -61,8 +60,23 @@ class SnapshotBlockText:
     route_payloads: tuple[str, ...]
 
 
-def get_snapshot(session: Session, config_id: int, kind: models.SnapshotKind) -> models.ConfigSnapshot | None:
-    return session.scalar(
+# Loads a snapshot's blocks and their per-block collections in one SELECT
+# each, instead of one lazy load per block as the renderers walk them.
+_BLOCK_CHILDREN_LOAD = (
+    selectinload(models.ConfigSnapshot.server_blocks).selectinload(models.ServerBlock.sites),
+    selectinload(models.ConfigSnapshot.server_blocks).selectinload(models.ServerBlock.fragments),
+    selectinload(models.ConfigSnapshot.server_blocks).selectinload(models.ServerBlock.directives),
+)
+
+
+def get_snapshot(
+    session: Session,
+    config_id: int,
+    kind: models.SnapshotKind,
+    *,
+    with_blocks: bool = False,
+) -> models.ConfigSnapshot | None:
+    stmt = (
         select(models.ConfigSnapshot)
         .where(
             models.ConfigSnapshot.config_id == config_id,
@@ -70,16 +84,13 @@ def get_snapshot(session: Session, config_id: int, kind: models.SnapshotKind) ->
         )
         .limit(1)
     )
+    if with_blocks:
+        stmt = stmt.options(*_BLOCK_CHILDREN_LOAD)
+    return session.scalar(stmt)
 
 
 def structural_hash(snapshot: models.ConfigSnapshot) -> str:
-    route_blobs = _snapshot_route_blobs(snapshot)
-    if route_blobs is not None:
-        blob = json.dumps(route_blobs, sort_keys=True, ensure_ascii=False)
-        return sha256(blob.encode("utf-8")).hexdigest()
-    payload = [_block_payload(block) for block in sorted(snapshot.server_blocks, key=lambda b: b.block_index)]
-    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False)
-    return sha256(blob.encode("utf-8")).hexdigest()
+    return _snapshot_digests(snapshot).structural
 
 
 def compare_snapshots(
@@ -99,15 +110,17 @@ def compare_snapshots(
             right_hash=structural_hash(right) if right else None,
         )
 
-    left_blocks = _block_hashes(left)
-    right_blocks = _block_hashes(right)
+    left_digests = _snapshot_digests(left)
+    right_digests = _snapshot_digests(right)
+    left_blocks = left_digests.blocks
+    right_blocks = right_digests.blocks
     mismatch = 0
-    for block_index in sorted(set(left_blocks) | set(right_blocks)):
+    for block_index in left_blocks.keys() | right_blocks.keys():
         if left_blocks.get(block_index) != right_blocks.get(block_index):
             mismatch += 1
 
-    left_hash = structural_hash(left)
-    right_hash = structural_hash(right)
+    left_hash = left_digests.structural
+    right_hash = right_digests.structural
     status = "match" if left_hash == right_hash else "different"
     return SnapshotComparison(
         left_kind=left_kind,
@@ -119,74 +132,117 @@ def compare_snapshots(
     )
 
 
-def _block_hashes(snapshot: models.ConfigSnapshot) -> dict[int, str]:
+@dataclass(slots=True)
+class _SnapshotDigests:
+    structural: str
+    blocks: dict[int, bytes]
+
+
+# Digests keyed by the snapshot's stamp (see _snapshot_stamp). Keying on the
+# row rather than the loaded object lets each status refresh (which opens a
+# fresh session) reuse digests without touching the block children or running
+# `caddy adapt` again for Caddyfile snapshots.
+_DIGEST_CACHE_SIZE = 16
+_DIGEST_CACHE: OrderedDict[tuple[Any, ...], _SnapshotDigests] = OrderedDict()
+
+
+def _snapshot_stamp(snapshot: models.ConfigSnapshot) -> tuple[Any, ...] | None:
+    # Every write path sets a new source hash or collection time, and block
+    # rows are always reinserted with their snapshot, so this versions the
+    # snapshot's whole subtree. Unflushed snapshots have no stamp yet.
+    if snapshot.id is None or snapshot.collected_at is None:
+        return None
+    return (snapshot.id, snapshot.source_kind, snapshot.source_hash, snapshot.collected_at)
+
+
+def _snapshot_digests(snapshot: models.ConfigSnapshot) -> _SnapshotDigests:
+    key = _snapshot_stamp(snapshot)
+    cached = _DIGEST_CACHE.get(key) if key is not None else None
+    if cached is not None:
+        _DIGEST_CACHE.move_to_end(key)
+        return cached
+
+    # The structural hash is a hash of the per-block digests in block order, fed
+    # as each block is digested so the payloads are walked once and never joined
+    # into a single string. The relationships load in index order (see
+    # models), so neither the blocks nor their children are re-sorted here.
+    hasher = sha256()
+    blocks: dict[int, bytes] = {}
     route_blobs = _snapshot_route_blobs(snapshot)
     if route_blobs is not None:
-        return {
-            idx: sha256(blob.encode("utf-8")).hexdigest()
-            for idx, blob in enumerate(route_blobs)
-        }
-    return {
-        block.block_index: sha256(
-            json.dumps(_block_payload(block), sort_keys=True, ensure_ascii=False).encode("utf-8")
-        ).hexdigest()
-        for block in sorted(snapshot.server_blocks, key=lambda b: b.block_index)
-    }
+        for idx, route in enumerate(route_blobs):
+            blocks[idx] = digest = sha256(route.encode("utf-8")).digest()
+            hasher.update(digest)
+    else:
+        for block in snapshot.server_blocks:
+            payload = json.dumps(_block_payload(block), ensure_ascii=False)
+            blocks[block.block_index] = digest = sha256(payload.encode("utf-8")).digest()
+            hasher.update(digest)
+    digests = _SnapshotDigests(structural=hasher.hexdigest(), blocks=blocks)
+    # The payload fallback covers `caddy adapt` failing, which may be transient
+    # (binary missing or PATH not set yet), so only route-based digests are kept.
+    if key is not None and route_blobs is not None:
+        _DIGEST_CACHE[key] = digests
+        if len(_DIGEST_CACHE) > _DIGEST_CACHE_SIZE:
+            _DIGEST_CACHE.popitem(last=False)
+    return digests
 
 
 def _block_payload(block: models.ServerBlock) -> dict:
+    # Keys are written in sorted order at every level, so json.dumps emits the
+    # canonical form without sort_keys having to re-sort each dict.
     return {
-        "index": block.block_index,
-        "is_global": block.is_global,
-        "raw_prelude": block.raw_prelude,
-        "raw_postlude": block.raw_postlude,
-        "sites": [
-            {
-                "label": site.raw_label,
-                "host": site.host,
-                "port": site.port,
-                "scheme": site.scheme,
-                "is_ipv6": site.is_ipv6,
-                "is_wildcard": site.is_wildcard,
-                "order": site.label_index,
-            }
-            for site in sorted(block.sites, key=lambda site: site.label_index)
-        ],
-        "fragments": [
-            {
-                "kind": fragment.kind,
-                "content": fragment.content,
-                "index": fragment.fragment_index,
-            }
-            for fragment in sorted(block.fragments, key=lambda frag: frag.fragment_index)
-        ],
         "directives": [
             {
-                "name": directive.name,
-                "matcher": directive.matcher,
-                "line": directive.line_index,
-                "raw_leading": directive.raw_leading,
-                "raw_trailing": directive.raw_trailing,
-                "has_block": directive.has_block,
-                "raw_block_body": directive.raw_block_body,
                 "args": [
                     {
-                        "value": arg.value,
                         "index": arg.arg_index,
+                        "value": arg.value,
                     }
-                    for arg in sorted(directive.args, key=lambda arg: arg.arg_index)
+                    for arg in directive.args
                 ],
+                "has_block": directive.has_block,
                 "kv": [
                     {
-                        "section": kv.section,
+                        "index": kv.kv_index,
                         "key": kv.key,
+                        "section": kv.section,
                         "value": kv.value,
-                        "index": kv.kv_index,
                     }
-                    for kv in sorted(directive.kv_pairs, key=lambda kv: kv.kv_index)
+                    for kv in directive.kv_pairs
                 ],
+                "line": directive.line_index,
+                "matcher": directive.matcher,
+                "name": directive.name,
+                "raw_block_body": directive.raw_block_body,
+                "raw_leading": directive.raw_leading,
+                "raw_trailing": directive.raw_trailing,
             }
-            for directive in sorted(block.directives, key=lambda d: d.line_index)
+            for directive in block.directives
+        ],
+        "fragments": [
+            {
+                "content": fragment.content,
+                "index": fragment.fragment_index,
+                "kind": fragment.kind,
+            }
+            for fragment in block.fragments
+        ],
+        "index": block.block_index,
+        "is_global": block.is_global,
+        "raw_postlude": block.raw_postlude,
+        "raw_prelude": block.raw_prelude,
+        "sites": [
+            {
+                "host": site.host,
+                "is_ipv6": site.is_ipv6,
+                "is_wildcard": site.is_wildcard,
+                "label": site.raw_label,
+                "order": site.label_index,
+                "port": site.port,
+                "scheme": site.scheme,
+            }
+            for site in block.sites
         ],
     }
 
@@ -196,7 +252,7 @@ def load_snapshot_block_texts(db_path: Path, kind: models.SnapshotKind) -> list[
         config = session.scalar(select(models.Config).where(models.Config.name == DEFAULT_CONFIG_NAME))
         if not config:
             return []
-        snapshot = get_snapshot(session, config.id, kind)
+        snapshot = get_snapshot(session, config.id, kind, with_blocks=True)
         if snapshot is None:
             return []
         scrub_paths = _snapshot_scrub_paths(snapshot)
@@ -283,8 +339,7 @@ def _routes_from_caddyfile_snapshot(snapshot: models.ConfigSnapshot) -> list[str
 
 def _routes_from_json_payload(payload: dict[str, Any], *, scrub_paths: tuple[str, ...]) -> list[str]:
     blobs: list[str] = []
-    blocks = blocks_from_caddy_json(payload)
-    for block in blocks:
+    for block in iter_blocks_from_caddy_json(payload):
         fragment = next((frag for frag in block.fragments if frag.kind == "json_route"), None)
         if fragment is None:
             continue
@@ -295,7 +350,29 @@ def _routes_from_json_payload(payload: dict[str, Any], *, scrub_paths: tuple[str
     return blobs
 
 
+# Rendered text keyed by snapshot stamp. The status comparisons and the block
+# editor render the same snapshot from separate sessions, so the text is joined
+# once per write. Kept small since each entry holds a whole Caddyfile.
+_RENDER_CACHE_SIZE = 4
+_RENDER_CACHE: OrderedDict[tuple[Any, ...], str] = OrderedDict()
+
+
 def render_snapshot_text(snapshot: models.ConfigSnapshot) -> str:
+    key = _snapshot_stamp(snapshot)
+    if key is None:
+        return _render_snapshot_text(snapshot)
+    cached = _RENDER_CACHE.get(key)
+    if cached is not None:
+        _RENDER_CACHE.move_to_end(key)
+        return cached
+    text = _render_snapshot_text(snapshot)
+    _RENDER_CACHE[key] = text
+    if len(_RENDER_CACHE) > _RENDER_CACHE_SIZE:
+        _RENDER_CACHE.popitem(last=False)
+    return text
+
+
+def _render_snapshot_text(snapshot: models.ConfigSnapshot) -> str:
     chunks: list[str] = []
     for block in sorted(snapshot.server_blocks, key=lambda b: b.block_index):
         if block.raw_prelude:
@@ -369,18 +446,10 @@ def _caddyfile_route_entries(snapshot: models.ConfigSnapshot) -> list[tuple[tupl
     text = render_snapshot_text(snapshot)
     if not text.strip():
         return []
-    with tempfile.NamedTemporaryFile("w", delete=False) as temp:
-        temp.write(text)
-        temp_path = Path(temp.name)
-    try:
-        adapted = adapt_caddyfile(temp_path)
-    finally:
-        temp_path.unlink(missing_ok=True)
+    adapted = adapt_caddyfile_text(text)
     entries: list[tuple[tuple[str, ...], str]] = []
-    base_paths = _snapshot_scrub_paths(snapshot)
-    scrub_paths = (*base_paths, str(temp_path))
-    blocks = blocks_from_caddy_json(adapted)
-    for block in blocks:
+    scrub_paths = (*_snapshot_scrub_paths(snapshot), STDIN_CONFIG_PATH)
+    for block in iter_blocks_from_caddy_json(adapted):
         key = _canonical_label_tuple(block.labels)
         fragment = next((frag for frag in block.fragments if frag.kind == "json_route"), None)
         if fragment is None:
@@ -403,21 +472,22 @@ def _normalise_json_fragment(content: str, *, scrub_paths: tuple[str, ...]) -> s
 
 
 def _scrub_file_server_hide(node: Any, scrub_paths: tuple[str, ...]) -> None:
-    if not scrub_paths:
+    if not scrub_paths or not isinstance(node, (dict, list)):
         return
-    if isinstance(node, dict):
-        handler = node.get("handler")
-        if handler == "file_server":
-            hide_value = node.get("hide")
-            hide_entries = _normalize_string_values(hide_value)
-            if hide_entries:
-                replaced = [CADDYFILE_HIDE_SENTINEL if entry in scrub_paths else entry for entry in hide_entries]
-                node["hide"] = replaced
-        for value in node.values():
-            _scrub_file_server_hide(value, scrub_paths)
-    elif isinstance(node, list):
-        for item in node:
-            _scrub_file_server_hide(item, scrub_paths)
+    # Walked with an explicit stack, and only containers are pushed, so scalar
+    # leaves never cost a call. Visit order doesn't matter for in-place edits.
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, dict):
+            if node.get("handler") == "file_server":
+                hide_entries = _normalize_string_values(node.get("hide"))
+                if hide_entries:
+                    node["hide"] = [CADDYFILE_HIDE_SENTINEL if entry in scrub_paths else entry for entry in hide_entries]
+            values = node.values()
+        else:
+            values = node
+        stack.extend(value for value in values if isinstance(value, (dict, list)))
 
 
 @dataclass(slots=True)
@@ -434,17 +504,24 @@ class _BlockJsonMetadata:
     status_codes: tuple[str, ...]
 
 
+@dataclass(slots=True)
+class _MetadataCollector:
+    """Accumulates block metadata; the value fields are insertion-ordered sets."""
+
+    handles: list[str] = field(default_factory=list)
+    handlers: dict[str, None] = field(default_factory=dict)
+    hosts: dict[str, None] = field(default_factory=dict)
+    roots: dict[str, None] = field(default_factory=dict)
+    paths: dict[str, None] = field(default_factory=dict)
+    groups: dict[str, None] = field(default_factory=dict)
+    encodings: dict[str, None] = field(default_factory=dict)
+    locations: dict[str, None] = field(default_factory=dict)
+    dials: dict[str, None] = field(default_factory=dict)
+    status_codes: dict[str, None] = field(default_factory=dict)
+
+
 def _block_json_metadata(block: models.ServerBlock) -> _BlockJsonMetadata:
-    handles: list[str] = []
-    handlers: list[str] = []
-    hosts: list[str] = []
-    roots: list[str] = []
-    paths: list[str] = []
-    groups: list[str] = []
-    encodings: list[str] = []
-    locations: list[str] = []
-    dials: list[str] = []
-    status_codes: list[str] = []
+    collector = _MetadataCollector()
     fragments = sorted(block.fragments, key=lambda f: f.fragment_index)
     for fragment in fragments:
         if fragment.kind != "json_route":
@@ -455,104 +532,71 @@ def _block_json_metadata(block: models.ServerBlock) -> _BlockJsonMetadata:
             continue
         if not isinstance(route, dict):
             continue
-        _collect_route_metadata(
-            route,
-            handles,
-            handlers,
-            hosts,
-            roots,
-            paths,
-            groups,
-            encodings,
-            locations,
-            dials,
-            status_codes,
-            prefix=(),
-        )
+        _collect_route_metadata(route, collector, prefix=())
     return _BlockJsonMetadata(
-        handles=tuple(handles),
-        handlers=tuple(handlers),
-        hosts=tuple(_dedupe_preserve_order(hosts)),
-        roots=tuple(_dedupe_preserve_order(roots)),
-        paths=tuple(_dedupe_preserve_order(paths)),
-        groups=tuple(_dedupe_preserve_order(groups)),
-        encodings=tuple(_dedupe_preserve_order(encodings)),
-        locations=tuple(_dedupe_preserve_order(locations)),
-        dials=tuple(_dedupe_preserve_order(dials)),
-        status_codes=tuple(_dedupe_preserve_order(status_codes)),
+        handles=tuple(collector.handles),
+        handlers=tuple(collector.handlers),
+        hosts=tuple(collector.hosts),
+        roots=tuple(collector.roots),
+        paths=tuple(collector.paths),
+        groups=tuple(collector.groups),
+        encodings=tuple(collector.encodings),
+        locations=tuple(collector.locations),
+        dials=tuple(collector.dials),
+        status_codes=tuple(collector.status_codes),
     )
 
 
 def _collect_route_metadata(
     node: dict[str, Any] | None,
-    handles: list[str],
-    handlers: list[str],
-    hosts: list[str],
-    roots: list[str],
-    paths: list[str],
-    groups: list[str],
-    encodings: list[str],
-    locations: list[str],
-    dials: list[str],
-    status_codes: list[str],
+    collector: _MetadataCollector,
     *,
     prefix: tuple[str, ...],
 ) -> None:
     if not isinstance(node, dict):
         return
-    _extend_unique(hosts, _hosts_from_matchers(node))
-    _extend_unique(paths, _paths_from_matchers(node))
-    _extend_unique(groups, _groups_from_matchers(node))
-    entries = _normalise_handle_entries(node)
-    for idx, entry in enumerate(entries):
-        path_parts = (*prefix, f"handle[{idx}]")
-        raw_handler = entry.get("handler") if isinstance(entry, dict) else None
-        handler_name = _normalize_handler_name(raw_handler)
-        label = ".".join(path_parts)
-        if handler_name:
-            _extend_unique(roots, _root_values(entry))
-            _extend_unique(encodings, _encoding_values(entry))
-            _extend_unique(locations, _location_values(entry))
-            _extend_unique(dials, _dial_values(entry))
-            _extend_unique(paths, _handler_path_values(entry))
-            _extend_unique(status_codes, _status_code_values(entry))
-            if handler_name != "subroute":
-                handles.append(f"{label}: {handler_name}")
-                if handler_name not in handlers:
-                    handlers.append(handler_name)
-        _recurse_nested_routes(
-            entry,
-            handles,
-            handlers,
-            hosts,
-            roots,
-            paths,
-            groups,
-            encodings,
-            locations,
-            dials,
-            status_codes,
-            parent_path=path_parts,
+    # Depth-first with an explicit stack: each handle entry's nested routes are
+    # visited before the next entry, and a route's own nested routes after all
+    # of its entries, which is the order ``handles`` is reported in. Items are
+    # (is_entry, node, path) and are pushed in reverse so they pop in order.
+    stack: list[tuple[bool, dict[str, Any], tuple[str, ...]]] = [(False, node, prefix)]
+    while stack:
+        is_entry, node, path = stack.pop()
+        if is_entry:
+            handler_name = _normalize_handler_name(node.get("handler"))
+            if handler_name:
+                _extend_unique(collector.roots, _root_values(node))
+                _extend_unique(collector.encodings, _encoding_values(node))
+                _extend_unique(collector.locations, _location_values(node))
+                _extend_unique(collector.dials, _dial_values(node))
+                _extend_unique(collector.paths, _handler_path_values(node))
+                _extend_unique(collector.status_codes, _status_code_values(node))
+                if handler_name != "subroute":
+                    collector.handles.append(f"{'.'.join(path)}: {handler_name}")
+                    collector.handlers[handler_name] = None
+            stack.extend(reversed(_nested_route_items(node, path)))
+            continue
+        _extend_unique(collector.hosts, _hosts_from_matchers(node))
+        _extend_unique(collector.paths, _paths_from_matchers(node))
+        _extend_unique(collector.groups, _groups_from_matchers(node))
+        stack.extend(reversed(_nested_route_items(node, path)))
+        stack.extend(
+            (True, entry, (*path, f"handle[{idx}]"))
+            for idx, entry in reversed(list(enumerate(_normalise_handle_entries(node))))
         )
 
-    nested_routes = node.get("routes") if isinstance(node, dict) else None
-    if isinstance(nested_routes, list):
-        for idx, route in enumerate(nested_routes):
-            if isinstance(route, dict):
-                _collect_route_metadata(
-                    route,
-                    handles,
-                    handlers,
-                    hosts,
-                    roots,
-                    paths,
-                    groups,
-                    encodings,
-                    locations,
-                    dials,
-                    status_codes,
-                    prefix=(*prefix, f"routes[{idx}]"),
-                )
+
+def _nested_route_items(
+    node: dict[str, Any], path: tuple[str, ...]
+) -> list[tuple[bool, dict[str, Any], tuple[str, ...]]]:
+    nested_routes = node.get("routes")
+    if not isinstance(nested_routes, list):
+        return []
+    return [
+        (False, route, (*path, f"routes[{idx}]"))
+        for idx, route in enumerate(nested_routes)
+        if isinstance(route, dict)
+    ]
 
 
 def _normalise_handle_entries(node: dict[str, Any] | None) -> list[dict[str, Any]]:
@@ -570,55 +614,8 @@ def _normalise_handle_entries(node: dict[str, Any] | None) -> list[dict[str, Any
     return []
 
 
-def _recurse_nested_routes(
-    entry: dict[str, Any] | None,
-    handles: list[str],
-    handlers: list[str],
-    hosts: list[str],
-    roots: list[str],
-    paths: list[str],
-    groups: list[str],
-    encodings: list[str],
-    locations: list[str],
-    dials: list[str],
-    status_codes: list[str],
-    *,
-    parent_path: tuple[str, ...],
-) -> None:
-    if not isinstance(entry, dict):
-        return
-    nested_routes = entry.get("routes")
-    if not isinstance(nested_routes, list):
-        return
-    for idx, route in enumerate(nested_routes):
-        if isinstance(route, dict):
-            _collect_route_metadata(
-                route,
-                handles,
-                handlers,
-                hosts,
-                roots,
-                paths,
-                groups,
-                encodings,
-                locations,
-                dials,
-                status_codes,
-                prefix=(*parent_path, f"routes[{idx}]"),
-            )
-
-
 def _root_values(entry: dict[str, Any]) -> list[str]:
-    value = entry.get("root")
-    if isinstance(value, str):
-        return [value] if value else []
-    if isinstance(value, Iterable):
-        roots: list[str] = []
-        for item in value:
-            if isinstance(item, str) and item:
-                roots.append(item)
-        return roots
-    return []
+    return _normalize_string_values(entry.get("root"))
 
 
 def _hosts_from_matchers(node: dict[str, Any]) -> list[str]:
@@ -665,34 +662,22 @@ def _groups_from_matchers(node: dict[str, Any]) -> list[str]:
     return groups
 
 
-def _extend_unique(target: list[str], items: Iterable[str]) -> None:
+def _extend_unique(target: dict[str, None], items: Iterable[str]) -> None:
     for item in items:
-        if item and item not in target:
-            target.append(item)
+        if item:
+            target[item] = None
 
 
-def _dedupe_preserve_order(items: Iterable[str]) -> list[str]:
-    seen: set[str] = set()
-    ordered: list[str] = []
-    for item in items:
-        if item in seen:
-            continue
-        seen.add(item)
-        ordered.append(item)
-    return ordered
+# The iterables json.loads can produce. Checking the concrete types avoids the
+# much slower ABC lookup behind isinstance(value, Iterable).
+_JSON_ITERABLES = (list, dict)
 
 
 def _normalize_string_values(value: Any) -> list[str]:
-    if value is None:
-        return []
-    if isinstance(value, str):
+    if type(value) is str:
         return [value] if value else []
-    if isinstance(value, Iterable):
-        results: list[str] = []
-        for entry in value:
-            if isinstance(entry, str) and entry:
-                results.append(entry)
-        return results
+    if isinstance(value, _JSON_ITERABLES):
+        return [entry for entry in value if type(entry) is str and entry]
     return []
 
 
@@ -735,7 +720,7 @@ def _status_code_values(entry: dict[str, Any]) -> list[str]:
     if isinstance(value, str):
         trimmed = value.strip()
         return [trimmed] if trimmed else []
-    if isinstance(value, Iterable):
+    if isinstance(value, _JSON_ITERABLES):
         codes: list[str] = []
         for item in value:
             if isinstance(item, int):
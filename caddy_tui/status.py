@@ -216,10 +216,11 @@ def _refresh_live_snapshot(
     if api_status and getattr(api_status, "json_payload", None):
         try:
             import_caddy_json_payload(
-                api_status.json_payload,
+                api_status.json_data if api_status.json_data is not None else api_status.json_payload,
                 source_label=admin_endpoint or "caddy-admin",
                 target_snapshot=SNAPSHOT_KIND_CADDY_LIVE,
                 db_path=db_path,
+                size_hint=len(api_status.json_payload),
             )
             return
         except Exception as exc:  # pragma: no cover - parse/DB errors bubble to UI
@@ -266,8 +267,8 @@ def _collect_snapshot_details(db_path: Path, *, purge_live_snapshot: bool) -> _S
 
         comparisons: list[SnapshotComparison] = []
         for left, right in SNAPSHOT_PAIRINGS:
-            left_snapshot = get_snapshot(session, config.id, left)
-            right_snapshot = get_snapshot(session, config.id, right)
+            left_snapshot = get_snapshot(session, config.id, left, with_blocks=True)
+            right_snapshot = get_snapshot(session, config.id, right, with_blocks=True)
             comparisons.append(
                 compare_snapshots(
                     left_snapshot,
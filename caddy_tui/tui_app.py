@@ -19,13 +19,20 @@ from rich.panel import Panel
 from rich.table import Table
 from rich.text import Text
 
-from .block_editor import blocks_to_text, load_caddy_tui_blocks, parse_single_block, save_caddy_tui_blocks
+from .block_editor import (
+    blocks_to_text,
+    editing_session,
+    load_caddy_tui_blocks,
+    parse_single_block,
+    save_caddy_tui_blocks,
+)
 from .caddyfile_parser import ParsedBlock
 from .config import LIVE_CADDYFILE
 from .drift import compare_caddyfile, summarise_drift
 from .exporter import generate_caddyfile
 from .helper_runner import reload_caddy_service, restart_caddy_service
 from .importer import CaddyfilePermissionError, import_caddyfile
+from .live_api import close_live_connections
 from .models import SNAPSHOT_KIND_CADDYFILE, SNAPSHOT_KIND_CADDY_LIVE, SNAPSHOT_KIND_CADDY_TUI
 from .snapshots import SNAPSHOT_LABELS, SnapshotBlockText, SnapshotComparison, load_snapshot_block_texts
 from .status import AppStatus, ServiceStatus, SnapshotInfo, collect_app_status, refresh_live_snapshot
@@ -610,10 +617,9 @@ class TerminalMenuApp:
         return first_line.strip()
 
     def _add_caddy_tui_block(self) -> None:
-        result = self._load_blocks_for_editor(require_existing=False)
-        if result is None:
-            return
-        db_path, blocks = result
+        self._run_block_editor(self._add_block, require_existing=False)
+
+    def _add_block(self, db_path: Path, blocks: list[ParsedBlock]) -> None:
         template = "example.com {\n    respond \"hello\"\n}\n"
         content = self._launch_editor(template)
         if content is None:
@@ -625,7 +631,7 @@ class TerminalMenuApp:
             return
         blocks.append(new_block)
         try:
-            save_caddy_tui_blocks(blocks, db_path)
+            self._save_editor_blocks(blocks, db_path)
         except Exception as exc:
             blocks.pop()
             self._set_message(f"Failed to save block: {exc}", style="red")
@@ -633,10 +639,9 @@ class TerminalMenuApp:
         self._set_message(f"Added block #{len(blocks)} to caddy-tui snapshot.", style="green")
 
     def _edit_caddy_tui_block(self) -> None:
-        result = self._load_blocks_for_editor(require_existing=True)
-        if result is None:
-            return
-        db_path, blocks = result
+        self._run_block_editor(self._edit_block, require_existing=True)
+
+    def _edit_block(self, db_path: Path, blocks: list[ParsedBlock]) -> None:
         self._display_caddy_tui_blocks(blocks, title="Edit block")
         selection = self._prompt_block_selection(len(blocks), "edit")
         if selection is None:
@@ -657,7 +662,7 @@ class TerminalMenuApp:
         original = blocks[selection]
         blocks[selection] = replacement
         try:
-            save_caddy_tui_blocks(blocks, db_path)
+            self._save_editor_blocks(blocks, db_path)
         except Exception as exc:
             blocks[selection] = original
             self._set_message(f"Failed to save edits: {exc}", style="red")
@@ -665,10 +670,9 @@ class TerminalMenuApp:
         self._set_message(f"Updated block #{selection + 1}.", style="green")
 
     def _delete_caddy_tui_block(self) -> None:
-        result = self._load_blocks_for_editor(require_existing=True)
-        if result is None:
-            return
-        db_path, blocks = result
+        self._run_block_editor(self._delete_block, require_existing=True)
+
+    def _delete_block(self, db_path: Path, blocks: list[ParsedBlock]) -> None:
         self._display_caddy_tui_blocks(blocks, title="Delete block")
         selection = self._prompt_block_selection(len(blocks), "delete")
         if selection is None:
@@ -679,24 +683,37 @@ class TerminalMenuApp:
             return
         removed = blocks.pop(selection)
         try:
-            save_caddy_tui_blocks(blocks, db_path)
+            self._save_editor_blocks(blocks, db_path)
         except Exception as exc:
             blocks.insert(selection, removed)
             self._set_message(f"Failed to delete block: {exc}", style="red")
             return
         self._set_message(f"Deleted block #{selection + 1}.", style="green")
 
-    def _load_blocks_for_editor(self, *, require_existing: bool) -> tuple[Path, list[ParsedBlock]] | None:
+    def _run_block_editor(
+        self,
+        action: Callable[[Path, list[ParsedBlock]], None],
+        *,
+        require_existing: bool,
+    ) -> None:
         status = self._latest_status
         if status is None or not status.db_ready:
             self._set_message("Database is not initialised. Run an import first.", style="yellow")
-            return None
+            return
         db_path = status.db_path
-        blocks = load_caddy_tui_blocks(db_path)
+        # The session only spans the load; the action runs $EDITOR and input()
+        # prompts, which must not hold the database lock.
+        with editing_session(db_path) as (session, _config):
+            blocks = load_caddy_tui_blocks(db_path, session=session)
         if require_existing and not blocks:
             self._set_message("No caddy-tui snapshot available. Run an import first.", style="yellow")
-            return None
-        return db_path, list(blocks)
+            return
+        action(db_path, list(blocks))
+
+    @staticmethod
+    def _save_editor_blocks(blocks: list[ParsedBlock], db_path: Path) -> None:
+        with editing_session(db_path) as (session, _config):
+            save_caddy_tui_blocks(blocks, db_path, session=session)
 
     def _display_caddy_tui_blocks(self, blocks: list[ParsedBlock], *, title: str) -> None:
         if not blocks:
@@ -938,4 +955,7 @@ class TerminalMenuApp:
 
 
 def run_tui() -> None:
-    TerminalMenuApp().run()
+    try:
+        TerminalMenuApp().run()
+    finally:
+        close_live_connections()
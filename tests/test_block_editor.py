@@ -0,0 +1,51 @@
+from pathlib import Path
+
+from sqlalchemy import select
+
+from caddy_tui import db
+from caddy_tui.block_editor import load_caddy_tui_blocks, parse_single_block, save_caddy_tui_blocks
+from caddy_tui.importer import import_caddyfile_text
+from caddy_tui.models import SNAPSHOT_KIND_CADDY_TUI, ServerBlock
+
+
+def _reset_db(tmp_path: Path) -> Path:
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    db_path = tmp_path / "config.db"
+    db.init_db(db_path)
+    return db_path
+
+
+def _seed(db_path: Path) -> None:
+    import_caddyfile_text(
+        "# sites\nexample.com {\n    respond \"ok\"\n}\n",
+        source_label="seed",
+        target_snapshot=SNAPSHOT_KIND_CADDY_TUI,
+        db_path=db_path,
+    )
+
+
+def test_save_appended_block_round_trips(tmp_path: Path):
+    db_path = _reset_db(tmp_path)
+    _seed(db_path)
+    blocks = load_caddy_tui_blocks(db_path)
+    blocks.append(parse_single_block("\nexample.org, www.example.org {\n    respond \"hi\"\n}\n"))
+    save_caddy_tui_blocks(blocks, db_path)
+
+    reloaded = load_caddy_tui_blocks(db_path)
+    assert [block.labels for block in reloaded] == [["example.com"], ["example.org", "www.example.org"]]
+    assert reloaded[0].raw_postlude == ""
+    assert reloaded[1].raw_prelude == "\n\n"
+
+
+def test_save_unchanged_blocks_keeps_rows(tmp_path: Path):
+    db_path = _reset_db(tmp_path)
+    _seed(db_path)
+    with db.session_scope(db_path) as session:
+        before = session.scalars(select(ServerBlock.id).order_by(ServerBlock.id)).all()
+
+    save_caddy_tui_blocks(load_caddy_tui_blocks(db_path), db_path)
+
+    with db.session_scope(db_path) as session:
+        after = session.scalars(select(ServerBlock.id).order_by(ServerBlock.id)).all()
+    assert after == before
@@ -0,0 +1,48 @@
+import pytest
+
+from caddy_tui.caddyfile_parser import CaddyfileParseError, is_whitespace_or_comments, parse_caddyfile_text
+
+
+def test_parse_nested_blocks_round_trip():
+    text = (
+        "# leading comment\n"
+        "{\n    email admin@example.com\n}\n\n"
+        "example.com, www.example.com {\n"
+        "    handle /api/* {\n        reverse_proxy 127.0.0.1:8080\n    }\n"
+        "}\n"
+        "# trailing\n"
+    )
+    parsed = parse_caddyfile_text(text)
+    assert len(parsed.blocks) == 2
+    assert parsed.blocks[0].is_global is True
+    assert parsed.blocks[0].raw_prelude == "# leading comment\n"
+    assert parsed.blocks[1].labels == ["example.com", "www.example.com"]
+    assert parsed.blocks[1].fragments[-1].content == "}"
+    assert parsed.blocks[1].raw_postlude == "\n# trailing\n"
+    rebuilt = "".join(
+        block.raw_prelude + "".join(fragment.content for fragment in block.fragments) + block.raw_postlude
+        for block in parsed.blocks
+    )
+    assert rebuilt == text
+
+
+def test_parse_unbalanced_braces_raises():
+    with pytest.raises(CaddyfileParseError):
+        parse_caddyfile_text("example.com {\n    handle {\n}\n")
+
+
+def test_parse_cache_returns_independent_copies():
+    text = "example.com {\n    respond ok\n}\n"
+    first = parse_caddyfile_text(text)
+    first.blocks[0].labels.append("mutated")
+    first.blocks[0].fragments.clear()
+    second = parse_caddyfile_text(text)
+    assert second.blocks[0].labels == ["example.com"]
+    assert second.blocks[0].fragments
+
+
+def test_is_whitespace_or_comments():
+    assert is_whitespace_or_comments("")
+    assert is_whitespace_or_comments("\n  # note\n\t\n")
+    assert not is_whitespace_or_comments("# unterminated")
+    assert not is_whitespace_or_comments("\nexample.com\n")
@@ -1,8 +1,8 @@
 from pathlib import Path
 
-from sqlalchemy import inspect
+from sqlalchemy import inspect, select
 
-from caddy_tui import db
+from caddy_tui import db, models
 
 
 def test_init_db(tmp_path: Path):
@@ -13,3 +13,89 @@ def test_init_db(tmp_path: Path):
     tables = insp.get_table_names()
     assert "configs" in tables
     assert "server_blocks" in tables
+
+
+def test_connections_use_wal(tmp_path: Path):
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    db_path = tmp_path / "wal.db"
+    engine = db.get_engine(db_path)
+    with engine.connect() as conn:
+        assert conn.exec_driver_sql("PRAGMA journal_mode").scalar() == "wal"
+        assert conn.exec_driver_sql("PRAGMA foreign_keys").scalar() == 1
+        assert conn.exec_driver_sql("PRAGMA synchronous").scalar() == 1  # NORMAL
+        assert conn.exec_driver_sql("PRAGMA temp_store").scalar() == 2  # MEMORY
+        assert conn.exec_driver_sql("PRAGMA cache_size").scalar() == -65536
+
+
+def test_schema_stamp_skips_bootstrap_for_unchanged_db(tmp_path: Path, monkeypatch):
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    db_path = tmp_path / "stamped.db"
+    db.get_engine(db_path)
+    assert (tmp_path / "stamped.schema-stamp").read_text().startswith(f"{db.SCHEMA_STAMP_VERSION}:")
+
+    calls: list[object] = []
+    monkeypatch.setattr(db, "_ensure_schema_version", calls.append)
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    db.get_engine(db_path)
+    assert calls == []
+
+
+def test_missing_indexes_are_created_on_existing_db(tmp_path: Path):
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    db_path = tmp_path / "old.db"
+    engine = db.get_engine(db_path)
+    with engine.begin() as conn:
+        conn.exec_driver_sql("DROP INDEX ix_directives_block_order")
+    (tmp_path / "old.schema-stamp").unlink()
+
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    indexes = {index["name"] for index in inspect(db.get_engine(db_path)).get_indexes("directives")}
+    assert "ix_directives_block_order" in indexes
+
+
+def test_nested_session_scope_keeps_outer_writes(tmp_path: Path):
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    db_path = tmp_path / "nested.db"
+    db.init_db(db_path)
+    with db.session_scope(db_path) as session:
+        session.add(models.Config(name="default", caddyfile_path="/before"))
+
+    with db.session_scope(db_path) as session:
+        config = session.scalar(select(models.Config))
+        config.caddyfile_path = "/after"
+        session.flush()
+        with db.session_scope(db_path) as inner:
+            assert inner is session
+            assert inner.scalar(select(models.Config.caddyfile_path)) == "/after"
+        db.data_fingerprint(db_path)
+
+    with db.session_scope(db_path) as session:
+        assert session.scalar(select(models.Config.caddyfile_path)) == "/after"
+
+
+def test_data_fingerprint_sees_other_connection_writes_within_mtime_tick(tmp_path: Path):
+    import os
+    import sqlite3
+
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    db_path = tmp_path / "fingerprint.db"
+    db.init_db(db_path)
+    wal_path = Path(f"{db_path}-wal")
+    before = db.data_fingerprint(db_path)
+    stamps = {path: path.stat().st_mtime_ns for path in (db_path, wal_path) if path.exists()}
+
+    other = sqlite3.connect(db_path)
+    other.execute("INSERT INTO configs (name, caddyfile_path) VALUES ('other', '/etc/caddy/Caddyfile')")
+    other.commit()
+    other.close()
+    for path, mtime_ns in stamps.items():
+        os.utime(path, ns=(mtime_ns, mtime_ns))
+
+    assert db.data_fingerprint(db_path) != before
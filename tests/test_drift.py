@@ -3,7 +3,7 @@ from pathlib import Path
 from sqlalchemy import select
 
 from caddy_tui import db
-from caddy_tui.importer import import_caddyfile
+from caddy_tui.importer import import_caddyfile, import_caddyfile_text
 from caddy_tui.models import (
     Config,
     ConfigSnapshot,
@@ -14,7 +14,7 @@ from caddy_tui.models import (
     SNAPSHOT_KIND_CADDY_TUI,
 )
 from caddy_tui.exporter import render_caddyfile_text
-from caddy_tui.drift import compare_caddyfile, summarise_drift
+from caddy_tui.drift import MAX_DIFF_LINES, _bounded_unified_diff, compare_caddyfile, summarise_drift
 from caddy_tui import status as status_mod
 
 
@@ -78,7 +78,7 @@ def test_summarise_drift_respects_error(tmp_path: Path, monkeypatch):
     def _denied(*_args, **_kwargs):
         raise PermissionError
 
-    monkeypatch.setattr(Path, "read_text", _denied)
+    monkeypatch.setattr(Path, "open", _denied)
     monkeypatch.setattr(
         "caddy_tui.drift.stage_caddyfile_copy",
         lambda path: (None, "sudo helper", "Permission denied"),
@@ -95,14 +95,14 @@ def test_compare_caddyfile_uses_helper_on_permission(monkeypatch, tmp_path: Path
     mirror = tmp_path / "mirror"
     mirror.write_text(render_caddyfile_text(db_path=db_path))
 
-    original_read = Path.read_text
+    original_open = Path.open
 
-    def fake_read(self, *args, **kwargs):
+    def fake_open(self, *args, **kwargs):
         if self == target:
             raise PermissionError
-        return original_read(self, *args, **kwargs)
+        return original_open(self, *args, **kwargs)
 
-    monkeypatch.setattr(Path, "read_text", fake_read)
+    monkeypatch.setattr(Path, "open", fake_open)
     monkeypatch.setattr(
         "caddy_tui.drift.stage_caddyfile_copy",
         lambda path: (mirror, "sudo helper", None),
@@ -133,3 +133,29 @@ def test_collect_app_status_includes_drift(tmp_path: Path, monkeypatch):
         and {comparison.left_kind, comparison.right_kind} == {SNAPSHOT_KIND_CADDY_TUI, SNAPSHOT_KIND_CADDYFILE}
         for comparison in info.comparisons
     )
+
+
+def test_compare_uses_stored_hash_without_rendering(tmp_path: Path, monkeypatch):
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    db_path = tmp_path / "config.db"
+    db.init_db(db_path)
+    text = "example.com {\n    respond \"ok\"\n}\n"
+    import_caddyfile_text(text, source_label="test", target_snapshot=SNAPSHOT_KIND_CADDY_TUI, db_path=db_path)
+    target = tmp_path / "Caddyfile"
+    target.write_text(render_caddyfile_text(db_path=db_path))
+
+    def _fail(*_args, **_kwargs):
+        raise AssertionError("rendered despite stored hash")
+
+    monkeypatch.setattr("caddy_tui.drift.render_caddyfile_bytes_and_hash", _fail)
+    report = compare_caddyfile(target, db_path=db_path)
+    assert report.in_sync is True
+
+
+def test_bounded_diff_caps_large_inputs():
+    a = [f"line {i}" for i in range(50_000)]
+    b = [f"other {i}" for i in range(50_000)]
+    lines = _bounded_unified_diff(a, b, fromfile="Caddyfile").splitlines()
+    assert len(lines) == MAX_DIFF_LINES + 1
+    assert lines[-1] == "... diff truncated ..."
@@ -1,5 +1,9 @@
+import os
 from pathlib import Path
 
+import pytest
+from sqlalchemy import select
+
 from caddy_tui import db
 from caddy_tui.models import (
     Config,
@@ -9,7 +13,7 @@ from caddy_tui.models import (
     ServerBlockSite,
     SNAPSHOT_KIND_CADDY_TUI,
 )
-from caddy_tui.exporter import generate_caddyfile, render_caddyfile_text
+from caddy_tui.exporter import generate_caddyfile, render_caddyfile_text, render_caddyfile_text_and_hash
 
 
 def test_generate_basic_caddyfile(tmp_path: Path):
@@ -46,3 +50,116 @@ def test_generate_basic_caddyfile(tmp_path: Path):
     assert sample_block.strip() in target.read_text()
     rendered = render_caddyfile_text(db_path=db_path)
     assert sample_block.strip() in rendered
+
+
+def test_render_cache_tracks_database_writes(tmp_path: Path):
+    db_path = tmp_path / "config.db"
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    db.init_db(db_path)
+    with db.session_scope(db_path) as session:
+        config = Config(name="default", caddyfile_path="/etc/caddy/Caddyfile")
+        session.add(config)
+        session.flush()
+        snapshot = ConfigSnapshot(config=config, source_kind=SNAPSHOT_KIND_CADDY_TUI)
+        session.add(snapshot)
+        session.flush()
+        block = ServerBlock(snapshot=snapshot, block_index=0, raw_prelude=None, raw_postlude=None)
+        session.add(block)
+        session.flush()
+        block.fragments.append(RawFragment(fragment_index=0, kind="block", content="a.example {\n}\n"))
+
+    first_text, first_hash = render_caddyfile_text_and_hash(db_path=db_path)
+    assert render_caddyfile_text_and_hash(db_path=db_path) == (first_text, first_hash)
+
+    with db.session_scope(db_path) as session:
+        fragment = session.scalars(select(RawFragment)).one()
+        fragment.content = "b.example {\n}\n"
+
+    second_text, second_hash = render_caddyfile_text_and_hash(db_path=db_path)
+    assert second_text == "b.example {\n}\n"
+    assert second_hash != first_hash
+
+
+def test_render_with_shared_session_sees_pending_edits(tmp_path: Path):
+    db_path = tmp_path / "config.db"
+    db._engine = None  # type: ignore[attr-defined]
+    db._SessionLocal = None  # type: ignore[attr-defined]
+    db.init_db(db_path)
+    with db.session_scope(db_path) as session:
+        config = Config(name="default", caddyfile_path="/etc/caddy/Caddyfile")
+        session.add(config)
+        session.flush()
+        snapshot = ConfigSnapshot(config=config, source_kind=SNAPSHOT_KIND_CADDY_TUI)
+        session.add(snapshot)
+        session.flush()
+        block = ServerBlock(snapshot=snapshot, block_index=0, raw_prelude=None, raw_postlude=None)
+        session.add(block)
+        session.flush()
+        block.fragments.append(RawFragment(fragment_index=0, kind="block", content="a.example {\n}\n"))
+
+    assert render_caddyfile_text(db_path=db_path) == "a.example {\n}\n"
+    with db.session_scope(db_path) as session:
+        session.scalars(select(RawFragment)).one().content = "b.example {\n}\n"
+        assert render_caddyfile_text(db_path=db_path, session=session) == "b.example {\n}\n"
+        target = tmp_path / "Caddyfile.generated"
+        generate_caddyfile(target, db_path=db_path, session=session)
+        assert target.read_text() == "b.example {\n}\n"
+
+
+def test_generate_keeps_target_when_render_fails(tmp_path: Path, monkeypatch):
+    target = tmp_path / "Caddyfile"
+    target.write_text("existing {\n}\n")
+
+    def broken_render(*_args, **_kwargs):
+        raise PermissionError("database is locked down")
+
+    monkeypatch.setattr("caddy_tui.exporter.render_caddyfile_bytes", broken_render)
+    monkeypatch.setattr(
+        "caddy_tui.exporter.install_generated_file",
+        lambda *_args: pytest.fail("render errors must not reach the helper fallback"),
+    )
+    with pytest.raises(PermissionError, match="locked down"):
+        generate_caddyfile(target)
+    assert target.read_text() == "existing {\n}\n"
+
+
+def test_generate_replaces_target_atomically(tmp_path: Path, monkeypatch):
+    target = tmp_path / "Caddyfile"
+    target.write_text("existing {\n}\n")
+    target.chmod(0o640)
+    if os.getuid() == 0:
+        os.chown(target, 1234, 4321)
+    monkeypatch.setattr("caddy_tui.exporter.render_caddyfile_bytes", lambda *_args, **_kwargs: b"new {\n}\n")
+
+    generate_caddyfile(target)
+
+    assert target.read_text() == "new {\n}\n"
+    assert target.stat().st_mode & 0o777 == 0o640
+    if os.getuid() == 0:
+        assert (target.stat().st_uid, target.stat().st_gid) == (1234, 4321)
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["Caddyfile"]
+
+
+def test_generate_creates_new_file_with_umask_mode(tmp_path: Path, monkeypatch):
+    target = tmp_path / "Caddyfile"
+    monkeypatch.setattr("caddy_tui.exporter.render_caddyfile_bytes", lambda *_args, **_kwargs: b"new {\n}\n")
+    previous = os.umask(0o022)
+    try:
+        generate_caddyfile(target)
+    finally:
+        os.umask(previous)
+    assert target.stat().st_mode & 0o777 == 0o644
+
+
+def test_generate_writes_in_place_when_directory_is_read_only(tmp_path: Path, monkeypatch):
+    target = tmp_path / "Caddyfile"
+    target.write_text("existing {\n}\n")
+    inode = target.stat().st_ino
+    monkeypatch.setattr("caddy_tui.exporter.render_caddyfile_bytes", lambda *_args, **_kwargs: b"new {\n}\n")
+    monkeypatch.setattr("caddy_tui.exporter.os.access", lambda path, mode: Path(path) != tmp_path)
+
+    generate_caddyfile(target)
+
+    assert target.read_text() == "new {\n}\n"
+    assert target.stat().st_ino == inode
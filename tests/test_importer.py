@@ -3,7 +3,7 @@ from pathlib import Path
 import pytest
 from sqlalchemy import select
 
-from caddy_tui import db
+from caddy_tui import db, importer
 from caddy_tui.importer import (
     import_caddyfile,
     import_caddyfile_text,
@@ -235,3 +235,114 @@ def test_import_caddy_json_payload(tmp_path: Path):
         )
         assert snapshot is not None
         assert len(snapshot.server_blocks) == 1
+
+
+def test_import_caddy_json_payload_passes_size_hint_for_decoded_dicts(tmp_path: Path, monkeypatch):
+    db_path = _reset_db(tmp_path)
+    hints: list[int] = []
+    real_fingerprint = importer._json_fingerprint
+
+    def spy(data, *, size_hint=0):
+        hints.append(size_hint)
+        return real_fingerprint(data, size_hint=size_hint)
+
+    monkeypatch.setattr(importer, "_json_fingerprint", spy)
+    raw = '{"apps": {}}'
+    import_caddy_json_payload(raw, source_label="admin-api", db_path=db_path)
+    import_caddy_json_payload({"apps": {}}, source_label="admin-api", db_path=db_path, size_hint=len(raw))
+    import_caddy_json_payload({"apps": {}}, source_label="admin-api", db_path=db_path)
+    assert hints == [len(raw), len(raw), 0]
+
+
+@pytest.mark.parametrize("has_returning", [True, False])
+def test_import_caddyfile_text_keeps_sites_with_their_blocks(tmp_path: Path, monkeypatch, has_returning: bool):
+    monkeypatch.setattr(importer, "_SQLITE_HAS_RETURNING", has_returning)
+    db_path = _reset_db(tmp_path)
+    text = "".join(f"site{i}.example, www.site{i}.example {{\n    respond \"{i}\"\n}}\n" for i in range(40))
+    import_caddyfile_text(text, source_label="test", target_snapshot=SNAPSHOT_KIND_CADDY_TUI, db_path=db_path)
+    with db.session_scope(db_path=db_path) as session:
+        blocks = session.scalars(
+            select(ServerBlock)
+            .join(ConfigSnapshot)
+            .where(ConfigSnapshot.source_kind == SNAPSHOT_KIND_CADDY_TUI)
+            .order_by(ServerBlock.block_index)
+        ).all()
+        assert len(blocks) == 40
+        for index, block in enumerate(blocks):
+            assert [site.raw_label for site in block.sites] == [f"site{index}.example", f"www.site{index}.example"]
+            assert f"respond \"{index}\"" in "".join(fragment.content for fragment in block.fragments)
+
+
+def test_import_caddyfile_text_skips_unchanged_content(tmp_path: Path):
+    db_path = _reset_db(tmp_path)
+    text = "example.com {\n    respond \"ok\"\n}\n"
+
+    def _snapshot_state():
+        with db.session_scope(db_path=db_path) as session:
+            snapshot = session.scalar(
+                select(ConfigSnapshot).where(ConfigSnapshot.source_kind == SNAPSHOT_KIND_CADDY_TUI)
+            )
+            assert snapshot is not None
+            return snapshot.collected_at, [block.id for block in snapshot.server_blocks]
+
+    import_caddyfile_text(text, source_label="test", target_snapshot=SNAPSHOT_KIND_CADDY_TUI, db_path=db_path)
+    first_collected, first_ids = _snapshot_state()
+    import_caddyfile_text(text, source_label="test", target_snapshot=SNAPSHOT_KIND_CADDY_TUI, db_path=db_path)
+    second_collected, second_ids = _snapshot_state()
+    assert second_ids == first_ids
+    assert second_collected >= first_collected
+
+    import_caddyfile_text(
+        text.replace("ok", "changed"), source_label="test", target_snapshot=SNAPSHOT_KIND_CADDY_TUI, db_path=db_path
+    )
+    with db.session_scope(db_path=db_path) as session:
+        fragments = session.scalars(
+            select(ServerBlock)
+            .join(ConfigSnapshot)
+            .where(ConfigSnapshot.source_kind == SNAPSHOT_KIND_CADDY_TUI)
+        ).one().fragments
+        assert "changed" in "".join(fragment.content for fragment in fragments)
+
+
+def test_import_caddyfile_text_rebuilds_snapshot_after_format_change(tmp_path: Path, monkeypatch):
+    db_path = _reset_db(tmp_path)
+    text = "example.com {\n    respond \"ok\"\n}\n"
+
+    def _block_ids():
+        with db.session_scope(db_path=db_path) as session:
+            return session.scalars(
+                select(ServerBlock.id)
+                .join(ConfigSnapshot)
+                .where(ConfigSnapshot.source_kind == SNAPSHOT_KIND_CADDY_TUI)
+            ).all()
+
+    import_caddyfile_text(text, source_label="test", target_snapshot=SNAPSHOT_KIND_CADDY_TUI, db_path=db_path)
+    first_ids = _block_ids()
+    monkeypatch.setattr(importer, "SNAPSHOT_FORMAT_VERSION", importer.SNAPSHOT_FORMAT_VERSION + 1)
+    import_caddyfile_text(text, source_label="test", target_snapshot=SNAPSHOT_KIND_CADDY_TUI, db_path=db_path)
+    second_ids = _block_ids()
+    assert len(second_ids) == len(first_ids) == 1
+    assert second_ids != first_ids
+    with db.session_scope(db_path=db_path) as session:
+        snapshot = session.scalar(
+            select(ConfigSnapshot).where(ConfigSnapshot.source_kind == SNAPSHOT_KIND_CADDY_TUI)
+        )
+        assert snapshot.snapshot_format == importer.SNAPSHOT_FORMAT_VERSION
+
+
+def test_find_caddyfile_reuses_recent_result(monkeypatch, tmp_path: Path):
+    from caddy_tui import importer
+
+    caddyfile = tmp_path / "Caddyfile"
+    caddyfile.write_text("localhost")
+    importer._invalidate_find_cache()
+    assert find_caddyfile(caddyfile) == caddyfile
+
+    def fail(_explicit):
+        raise AssertionError("search repeated")
+
+    monkeypatch.setattr(importer, "_search_caddyfile", fail)
+    assert find_caddyfile(caddyfile) == caddyfile
+    caddyfile.unlink()
+    with pytest.raises(AssertionError):
+        find_caddyfile(caddyfile)
@@ -1,4 +1,7 @@
-from caddy_tui.live_api import fetch_live_status
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from threading import Thread
+
+from caddy_tui.live_api import close_live_connections, fetch_live_status
 
 
 class DummyResponse:
@@ -6,8 +9,8 @@ class DummyResponse:
         self._payload = payload
         self.headers = {"Content-Type": content_type}
 
-    def read(self) -> bytes:
-        return self._payload.encode("utf-8")
+    def read(self, amt: int | None = None) -> bytes:
+        return self._payload.encode("utf-8")[:amt]
 
     def __enter__(self):
         return self
@@ -17,10 +20,10 @@ class DummyResponse:
 
 
 def test_fetch_live_status_returns_caddyfile(monkeypatch):
-    def fake_urlopen(request, timeout=0):  # noqa: ARG001 - signature mimics urlopen
+    def fake_open(endpoint, timeout=0):  # noqa: ARG001 - signature mimics _open_response
         return DummyResponse("example.com {\n    respond \"ok\"\n}\n", "text/caddyfile")
 
-    monkeypatch.setattr("caddy_tui.live_api.urlopen", fake_urlopen)
+    monkeypatch.setattr("caddy_tui.live_api._open_response", fake_open)
     status = fetch_live_status("http://admin/config")
     assert status is not None
     assert status.state == "live"
@@ -42,12 +45,82 @@ def test_fetch_live_status_counts_json_routes(monkeypatch):
     }
     """
 
-    def fake_urlopen(request, timeout=0):  # noqa: ARG001 - signature mimics urlopen
+    def fake_open(endpoint, timeout=0):  # noqa: ARG001 - signature mimics _open_response
         return DummyResponse(payload, "application/json")
 
-    monkeypatch.setattr("caddy_tui.live_api.urlopen", fake_urlopen)
+    monkeypatch.setattr("caddy_tui.live_api._open_response", fake_open)
     status = fetch_live_status("http://admin/config")
     assert status is not None
     assert status.block_count == 2
     assert status.caddyfile_text is None
     assert status.json_payload is not None
+    assert status.json_data is not None
+    assert "http" in status.json_data["apps"]
+
+
+def test_fetch_live_status_rejects_oversized_response(monkeypatch):
+    response = DummyResponse("{}", "application/json")
+    response.headers["Content-Length"] = str(64 * 1024 * 1024)
+
+    monkeypatch.setattr("caddy_tui.live_api._open_response", lambda endpoint, timeout=0: response)
+    status = fetch_live_status("http://admin/config")
+    assert status is not None
+    assert status.block_count is None
+    assert status.json_payload is None
+    assert status.error is not None and "too large" in status.error
+
+
+def test_fetch_live_status_caps_responses_without_length(monkeypatch):
+    response = DummyResponse('{"apps": {}}', "application/json")
+
+    monkeypatch.setattr("caddy_tui.live_api.MAX_RESPONSE_BYTES", 8)
+    monkeypatch.setattr("caddy_tui.live_api._open_response", lambda endpoint, timeout=0: response)
+    status = fetch_live_status("http://admin/config")
+    assert status is not None
+    assert status.json_payload is None
+    assert status.error is not None and "too large" in status.error
+
+
+class _RedirectingAdmin(BaseHTTPRequestHandler):
+    def do_GET(self):  # noqa: N802 - http.server naming
+        if self.path == "/config":
+            self.send_response(308)
+            self.send_header("Location", "/config/")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path == "/loop":
+            self.send_response(302)
+            self.send_header("Location", "/loop")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = b'{"apps": {"http": {"servers": {"srv0": {"routes": [{}]}}}}}'
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *_args):
+        pass
+
+
+def test_fetch_live_status_follows_redirects():
+    server = HTTPServer(("127.0.0.1", 0), _RedirectingAdmin)
+    Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        status = fetch_live_status(f"{base}/config")
+        assert status is not None
+        assert status.state == "live"
+        assert status.block_count == 1
+
+        looping = fetch_live_status(f"{base}/loop")
+        assert looping is not None
+        assert looping.state == "down"
+        assert looping.json_payload is None
+    finally:
+        close_live_connections()
+        server.shutdown()
+        server.server_close()
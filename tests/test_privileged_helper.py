@@ -0,0 +1,36 @@
+import errno
+import os
+
+from click.testing import CliRunner
+
+from caddy_tui import privileged_helper
+
+
+def test_reload_execs_service_command(monkeypatch):
+    calls: list[tuple[str, list[str]]] = []
+    monkeypatch.setattr(privileged_helper.os, "execvp", lambda file, args: calls.append((file, args)))
+    result = CliRunner().invoke(privileged_helper.main, ["reload", "--command", "systemctl reload 'caddy web'"])
+    assert result.exit_code == 0
+    assert calls == [("systemctl", ["systemctl", "reload", "caddy web"])]
+
+
+def test_mirror_copies_contents_and_timestamps(tmp_path, monkeypatch):
+    source = tmp_path / "Caddyfile"
+    source.write_text("example.com {\n    respond ok\n}\n")
+    os.utime(source, (1_000_000, 1_000_000))
+    dest = tmp_path / "staging" / "Caddyfile"
+    args = ["mirror", "--source", str(source), "--dest", str(dest), "--owner", str(os.getuid()), "--group", str(os.getgid())]
+
+    result = CliRunner().invoke(privileged_helper.main, args)
+    assert result.exit_code == 0, result.output
+    assert dest.read_text() == source.read_text()
+    assert dest.stat().st_mtime == 1_000_000
+
+    def refuse(*args, **kwargs):
+        raise OSError(errno.EXDEV, "cross-device")
+
+    monkeypatch.setattr(privileged_helper.os, "copy_file_range", refuse, raising=False)
+    dest.unlink()
+    result = CliRunner().invoke(privileged_helper.main, args)
+    assert result.exit_code == 0, result.output
+    assert dest.read_text() == source.read_text()
@@ -4,8 +4,9 @@ from pathlib import Path
 from sqlalchemy import select
 
 from caddy_tui import db, models
+from caddy_tui.caddy_integration import CaddyError
 from caddy_tui.importer import DEFAULT_CONFIG_NAME, import_caddy_json_payload, import_caddyfile_text
-from caddy_tui.snapshots import compare_snapshots, load_snapshot_block_texts
+from caddy_tui.snapshots import compare_snapshots, load_snapshot_block_texts, render_snapshot_text, structural_hash
 
 
 def _reset_db(tmp_path: Path) -> Path:
@@ -313,11 +314,14 @@ def test_compare_snapshots_uses_adapted_json(monkeypatch, tmp_path: Path):
         }
     }
 
-    def fake_adapt(path: Path):  # type: ignore[unused-argument]
+    adapt_calls: list[str] = []
+
+    def fake_adapt(text: str):
+        adapt_calls.append(text)
         return json_payload
 
-    monkeypatch.setattr("caddy_tui.importer.adapt_caddyfile", fake_adapt)
-    monkeypatch.setattr("caddy_tui.snapshots.adapt_caddyfile", fake_adapt)
+    monkeypatch.setattr("caddy_tui.importer.adapt_caddyfile", lambda path: json_payload)
+    monkeypatch.setattr("caddy_tui.snapshots.adapt_caddyfile_text", fake_adapt)
 
     import_caddyfile_text(
         "example.test {\n    respond \"ok\"\n}\n",
@@ -362,6 +366,43 @@ def test_compare_snapshots_uses_adapted_json(monkeypatch, tmp_path: Path):
         assert comparison.status == "match"
         assert comparison.mismatch_count == 0
 
+        # Repeat comparisons reuse the digests instead of adapting again.
+        assert len(adapt_calls) == 1
+        adapt_calls.clear()
+        for _ in range(2):
+            compare_snapshots(
+                file_snapshot,
+                live_snapshot,
+                left_kind=models.SNAPSHOT_KIND_CADDYFILE,
+                right_kind=models.SNAPSHOT_KIND_CADDY_LIVE,
+            )
+        assert adapt_calls == []
+
+    # A fresh session loads new objects for the same rows; digests carry over.
+    with db.session_scope(db_path) as session:
+        file_snapshot = session.scalar(
+            select(models.ConfigSnapshot).where(models.ConfigSnapshot.source_kind == models.SNAPSHOT_KIND_CADDYFILE)
+        )
+        assert file_snapshot is not None
+        assert structural_hash(file_snapshot) == comparison.left_hash
+    assert adapt_calls == []
+
+    # Rewriting the snapshot changes its stamp, so the digests are recomputed.
+    import_caddyfile_text(
+        "example.test {\n    respond \"changed\"\n}\n",
+        source_label="fs",
+        target_snapshot=models.SNAPSHOT_KIND_CADDYFILE,
+        db_path=db_path,
+    )
+    adapt_calls.clear()
+    with db.session_scope(db_path) as session:
+        file_snapshot = session.scalar(
+            select(models.ConfigSnapshot).where(models.ConfigSnapshot.source_kind == models.SNAPSHOT_KIND_CADDYFILE)
+        )
+        assert file_snapshot is not None
+        structural_hash(file_snapshot)
+    assert len(adapt_calls) == 1
+
 
 def test_block_texts_include_route_payloads(monkeypatch, tmp_path: Path):
     db_path = _reset_db(tmp_path)
@@ -388,11 +429,8 @@ def test_block_texts_include_route_payloads(monkeypatch, tmp_path: Path):
         }
     }
 
-    def fake_adapt(path: Path):  # type: ignore[unused-argument]
-        return json_payload
-
-    monkeypatch.setattr("caddy_tui.importer.adapt_caddyfile", fake_adapt)
-    monkeypatch.setattr("caddy_tui.snapshots.adapt_caddyfile", fake_adapt)
+    monkeypatch.setattr("caddy_tui.importer.adapt_caddyfile", lambda path: json_payload)
+    monkeypatch.setattr("caddy_tui.snapshots.adapt_caddyfile_text", lambda text: json_payload)
 
     import_caddyfile_text(
         "payload.test {\n    respond \"ok\"\n}\n",
@@ -415,3 +453,61 @@ def test_block_texts_include_route_payloads(monkeypatch, tmp_path: Path):
     assert caddyfile_blocks[0].route_payloads
     assert live_blocks[0].route_payloads
     assert caddyfile_blocks[0].route_payloads == live_blocks[0].route_payloads
+
+
+def test_render_snapshot_text_follows_snapshot_rewrites(monkeypatch, tmp_path: Path):
+    db_path = _reset_db(tmp_path)
+    monkeypatch.setattr("caddy_tui.importer.adapt_caddyfile", lambda path: {})
+
+    def rendered() -> str:
+        with db.session_scope(db_path) as session:
+            snapshot = session.scalar(
+                select(models.ConfigSnapshot).where(models.ConfigSnapshot.source_kind == models.SNAPSHOT_KIND_CADDYFILE)
+            )
+            assert snapshot is not None
+            return render_snapshot_text(snapshot)
+
+    first = "example.test {\n    respond \"one\"\n}\n"
+    import_caddyfile_text(first, source_label="fs", target_snapshot=models.SNAPSHOT_KIND_CADDYFILE, db_path=db_path)
+    assert rendered() == first
+    assert rendered() == first
+
+    second = "example.test {\n    respond \"two\"\n}\n"
+    import_caddyfile_text(second, source_label="fs", target_snapshot=models.SNAPSHOT_KIND_CADDYFILE, db_path=db_path)
+    assert rendered() == second
+
+
+def test_digests_retry_adapt_after_caddy_error(monkeypatch, tmp_path: Path):
+    db_path = _reset_db(tmp_path)
+    monkeypatch.setattr("caddy_tui.importer.adapt_caddyfile", lambda path: {})
+    import_caddyfile_text(
+        "retry.test {\n    respond \"ok\"\n}\n",
+        source_label="fs",
+        target_snapshot=models.SNAPSHOT_KIND_CADDYFILE,
+        db_path=db_path,
+    )
+
+    adapt_calls: list[str] = []
+
+    def missing_caddy(text: str):
+        adapt_calls.append(text)
+        raise CaddyError("Unable to locate caddy binary.")
+
+    def file_hash() -> str:
+        with db.session_scope(db_path) as session:
+            snapshot = session.scalar(
+                select(models.ConfigSnapshot).where(models.ConfigSnapshot.source_kind == models.SNAPSHOT_KIND_CADDYFILE)
+            )
+            assert snapshot is not None
+            return structural_hash(snapshot)
+
+    monkeypatch.setattr("caddy_tui.snapshots.adapt_caddyfile_text", missing_caddy)
+    fallback = file_hash()
+    file_hash()
+    assert len(adapt_calls) == 2
+
+    # Once caddy is available the adapted routes are used and then cached.
+    monkeypatch.setattr("caddy_tui.snapshots.adapt_caddyfile_text", lambda text: adapt_calls.append(text) or {})
+    assert file_hash() != fallback
+    file_hash()
+    assert len(adapt_calls) == 3